@@ -0,0 +1,191 @@
+"""
+Autopilot
+an input source that dodges on its own, so headless runs survive into the dense
+late sections of a level. Every frame it tries the nine moves (eight directions
+or standing still), follows each over a short lookahead against the predicted
+positions of nearby bullets and keeps the one with the most clearance.
+Its thinking happens in think(), outside the game's update, and is timed on its own
+"""
+
+from math import atan2, degrees, hypot, radians, sin
+from time import perf_counter
+
+import pygame
+
+from config import WIDTH, HEIGHT
+from objects import LAUNCHER_TYPES, LineBullet, LineBullet1, LineRay, Player, PointBullet, PointBulletPool, TriangleBullet1
+from replay import BITS, KeyState
+from utils import clamp
+
+# the player moves 7 pixels a frame, diagonals are normalized like in Player.update
+SPEED = 7
+DIAGONAL = SPEED / 2 ** 0.5
+MOVES = (
+    (0, 0, 0),
+    (-SPEED, 0, BITS[pygame.K_LEFT]),
+    (SPEED, 0, BITS[pygame.K_RIGHT]),
+    (0, -SPEED, BITS[pygame.K_UP]),
+    (0, SPEED, BITS[pygame.K_DOWN]),
+    (-DIAGONAL, -DIAGONAL, BITS[pygame.K_LEFT] | BITS[pygame.K_UP]),
+    (DIAGONAL, -DIAGONAL, BITS[pygame.K_RIGHT] | BITS[pygame.K_UP]),
+    (-DIAGONAL, DIAGONAL, BITS[pygame.K_LEFT] | BITS[pygame.K_DOWN]),
+    (DIAGONAL, DIAGONAL, BITS[pygame.K_RIGHT] | BITS[pygame.K_DOWN]),
+)
+# frames ahead at which every move is checked
+LOOKAHEAD = (1, 2, 4, 7, 10)
+# a ray's wedge fills up over a second, only where a move ends up this many frames ahead counts
+WEDGE_LOOKAHEAD = 25
+# bullets further than this from the player are ignored
+REACH = 160
+# clearance in pixels beyond which a move counts as perfectly safe
+SAFE = 40
+PLAYER_RADIUS = 11
+# launchers burst where they land, their target is avoided like a bullet of this radius
+BURST_RADIUS = 30
+LAUNCHERS = tuple(LAUNCHER_TYPES.values())
+# where the player starts, the bot drifts back towards it when nothing is close
+HOME = WIDTH // 2, HEIGHT // 2 + 150
+
+
+def point_to_segment(px, py, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else clamp(((px - x1) * dx + (py - y1) * dy) / length, 0, 1)
+    return hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+class Autopilot:
+    def __init__(self, object_manager=None):
+        self.object_manager = object_manager
+        self.keys = KeyState()
+        # the probe stands in for the player when testing objects without a motion model
+        self.probe = Player()
+        self.time = 0.0
+        self.last = 0.0
+        self.frames = 0
+
+    def hazards(self, player):
+        """
+        circles (x, y, vx, vy, r) and segments (x1, y1, x2, y2, vx, vy) near the player,
+        wedges (x, y, angle, offset) a LineRay is about to sweep with bullets, and everything else
+        """
+        px, py = player.x, player.y
+        circles = []
+        segments = []
+        wedges = []
+        others = []
+        for i in self.object_manager.objects:
+            _type = type(i)
+            if not i.collidable:
+                if _type in LAUNCHERS:
+                    x, y = i.target_pos
+                    if abs(x - px) < REACH and abs(y - py) < REACH:
+                        circles.append((x, y, 0, 0, BURST_RADIUS))
+                elif _type is LineRay and not i.done:
+                    wedges.append((i.x, i.y, i.angle, i.offset))
+                continue
+            if _type is PointBulletPool:
+                n = i.count
+                if n == 0:
+                    continue
+                # PointBullet.rect is offset by half a radius
+                r = i.r[:n]
+                x = i.x[:n] - r // 2 + r
+                y = i.y[:n] - r // 2 + r
+                near = ((x - px) ** 2 + (y - py) ** 2 < REACH * REACH).nonzero()[0]
+                speed = i.speed
+                for j in near.tolist():
+                    circles.append((float(x[j]), float(y[j]), i.dx[j] * speed, i.dy[j] * speed, int(r[j]) - 1))
+            elif _type is PointBullet:
+                r = i.r
+                x = i.x - r // 2 + r
+                y = i.y - r // 2 + r
+                if abs(x - px) < REACH and abs(y - py) < REACH:
+                    circles.append((x, y, i.dx * i.speed, i.dy * i.speed, r - 1))
+            elif _type is TriangleBullet1:
+                if abs(i.x - px) < REACH and abs(i.y - py) < REACH:
+                    r = max(hypot(ox, oy) for ox, oy in i.offsets)
+                    circles.append((i.x, i.y, i.dx, i.dy, r))
+            elif _type is LineBullet1 or _type is LineBullet:
+                left, top, right, bottom = i.get_bounds()
+                if left - REACH < px < right + REACH and top - REACH < py < bottom + REACH:
+                    (x1, y1), (x2, y2) = i.points
+                    if _type is LineBullet1:
+                        segments.append((x1, y1, x2, y2, i.dx * i.speed, i.dy * i.speed))
+                    else:
+                        segments.append((x1, y1, x2, y2, 0, 0))
+            else:
+                others.append(i)
+        return circles, segments, wedges, others
+
+    def clearance(self, x, y, t, circles, segments):
+        best = SAFE
+        for hx, hy, vx, vy, r in circles:
+            d = hypot(x - hx - vx * t, y - hy - vy * t) - r - PLAYER_RADIUS
+            if d < best:
+                best = d
+        for x1, y1, x2, y2, vx, vy in segments:
+            dx = vx * t
+            dy = vy * t
+            d = point_to_segment(x, y, x1 + dx, y1 + dy, x2 + dx, y2 + dy) - PLAYER_RADIUS
+            if d < best:
+                best = d
+        return best
+
+    @staticmethod
+    def wedge_clearance(x, y, wedges):
+        best = SAFE
+        for wx, wy, angle, offset in wedges:
+            # distance to the nearest edge, negative inside the wedge
+            delta = abs((degrees(atan2(y - wy, x - wx)) - angle + 180) % 360 - 180)
+            d = hypot(x - wx, y - wy) * sin(radians(min(delta - offset, 90))) - PLAYER_RADIUS
+            if d < best:
+                best = d
+        return best
+
+    def think(self):
+        """picks the keys for the coming frame"""
+        start = perf_counter()
+        player = self.object_manager.player if self.object_manager else None
+        if player:
+            circles, segments, wedges, others = self.hazards(player)
+            offset = 5 + player.size // 2
+            probe = self.probe
+            best_score = None
+            best_mask = 0
+            for vx, vy, mask in MOVES:
+                score = SAFE
+                for t in LOOKAHEAD:
+                    x = clamp(player.x + vx * t, offset, WIDTH - offset)
+                    y = clamp(player.y + vy * t, offset, HEIGHT - offset)
+                    score = min(score, self.clearance(x, y, t, circles, segments) + t * 0.5)
+                    if t == 1 and others:
+                        probe.x, probe.y = x, y
+                        if any(i.check_collision(probe) for i in others):
+                            score = -SAFE
+                if wedges:
+                    x = clamp(player.x + vx * WEDGE_LOOKAHEAD, offset, WIDTH - offset)
+                    y = clamp(player.y + vy * WEDGE_LOOKAHEAD, offset, HEIGHT - offset)
+                    score = min(score, self.wedge_clearance(x, y, wedges))
+                # with nothing close by, stay near the middle to keep room to dodge
+                x = clamp(player.x + vx, offset, WIDTH - offset)
+                y = clamp(player.y + vy, offset, HEIGHT - offset)
+                score -= hypot(x - HOME[0], y - HOME[1]) * 0.01
+                if best_score is None or score > best_score:
+                    best_score = score
+                    best_mask = mask
+            self.keys = KeyState(best_mask)
+        self.last = perf_counter() - start
+        self.time += self.last
+        self.frames += 1
+
+    def get_events(self):
+        return []
+
+    def get_pressed(self):
+        return self.keys
+
+    @staticmethod
+    def get_mouse_pos():
+        return 0, 0
@@ -0,0 +1,353 @@
+"""
+Benchmarks for the game's hot paths
+runs headless, e.g.
+python benchmark.py triangle-collision
+python benchmark.py sprites
+python benchmark.py splat
+python benchmark.py layers
+python benchmark.py levels --output results.json --compare benchmark_baseline.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from math import cos, sin, radians
+
+from config import FPS, WIDTH, HEIGHT, Globals
+from constants import ELAPSED_TIME_FOR_SOUNDTRACK, UPCOMING_LEVEL
+from headless import LEVELS, run_level
+from menu import MenuManager
+import splat
+import sprites
+from objects import LineBullet1, ObjectManager, PointBullet, PointBulletPool, TriangleEnemy, TriangleBullet1
+from profiler import PHASES
+from trig import burst, direction
+from utils import get_triangle
+
+
+def legacy_triangle_collision(bullet: TriangleBullet1, player):
+    # TriangleBullet1.check_collision before the geometry was precomputed
+    points = get_triangle(bullet.length, bullet.pos, bullet.angle)
+    for i in range(len(points)):
+        if player.rect.clipline(points[i % 3], points[(i + 1) % 3]):
+            return True
+    return False
+
+
+def triangle_collision(args):
+    """replays the triangle chart and times every way of colliding its bullets with the player"""
+    manager = ObjectManager()
+    manager.init()
+    manager.add(TriangleEnemy())
+    manager.collision_enabled = False
+    player = manager.player
+    timings = {'legacy': 0.0, 'sat': 0.0, 'manager': 0.0}
+    hits = {'legacy': 0, 'sat': 0}
+    tests = 0
+    frames = int((args.seconds or 79) * FPS)
+    for frame in range(frames):
+        Globals.set(ELAPSED_TIME_FOR_SOUNDTRACK, frame / FPS)
+        manager.update([])
+        # sweep the player around the arena so some bullets actually hit
+        player.x = WIDTH / 2 + WIDTH / 3 * pygame.math.Vector2(1, 0).rotate(frame).x
+        player.y = HEIGHT / 2 + HEIGHT / 3 * pygame.math.Vector2(1, 0).rotate(frame * 1.7).y
+        bullets = [i for i in manager.objects if isinstance(i, TriangleBullet1)]
+        tests += len(bullets)
+
+        t = time.perf_counter()
+        for i in bullets:
+            if legacy_triangle_collision(i, player):
+                hits['legacy'] += 1
+        timings['legacy'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        for i in bullets:
+            if i.check_collision(player):
+                hits['sat'] += 1
+        timings['sat'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        manager.check_collisions()
+        timings['manager'] += time.perf_counter() - t
+        player.alive = True
+
+    print(f'{frames} frames, {tests} triangle tests')
+    for name, value in timings.items():
+        print(f'{name:>8}: {value * 1000:9.2f} ms total  {value * 1e6 / frames:8.2f} us/frame  {hits.get(name, "-")} hits')
+    print(f'sat speedup over legacy: {timings["legacy"] / max(timings["sat"], 1e-9):.2f}x')
+
+
+def trig(args):
+    """times a 12-way spread and single directions with per-bullet trig against the lookup tables"""
+    bursts = int((args.seconds or 79) * FPS) * 10
+    offsets = [i % 31 - 15 for i in range(bursts)]
+
+    def spread_math():
+        for offset in offsets:
+            [(cos(radians(i)) * 3, sin(radians(i)) * 3) for i in range(offset, 360 + offset, 30)]
+
+    def spread_template():
+        for offset in offsets:
+            burst(30, offset, 3)
+
+    def direction_math():
+        for offset in offsets:
+            cos(radians(offset)), sin(radians(offset))
+
+    def direction_table():
+        for offset in offsets:
+            direction(offset)
+
+    timings = {}
+    for name, run in (('spread math', spread_math), ('spread template', spread_template),
+                      ('direction math', direction_math), ('direction table', direction_table)):
+        t = time.perf_counter()
+        run()
+        timings[name] = time.perf_counter() - t
+
+    print(f'{bursts} spreads / directions')
+    for name, value in timings.items():
+        print(f'{name:>16}: {value * 1000:9.2f} ms total  {value * 1e9 / bursts:8.1f} ns/call')
+    print(f'template speedup over per-bullet trig: {timings["spread math"] / max(timings["spread template"], 1e-9):.2f}x')
+    print(burst.cache_info())
+
+
+def legacy_draw(bullet, surf):
+    # the bullets' draw methods before sprites.py, rasterizing every shape every frame
+    if isinstance(bullet, PointBullet):
+        pygame.draw.circle(surf, 'white', (bullet.x, bullet.y), bullet.r)
+        pygame.draw.circle(surf, bullet.color, (bullet.x, bullet.y), bullet.r, 2 if bullet.r > 3 else 1)
+    elif isinstance(bullet, LineBullet1):
+        points = bullet.points
+        pygame.draw.line(surf, 'blue', points[0], points[1], 5)
+        pygame.draw.line(surf, 'white', points[0], points[1], 2)
+    else:
+        points = bullet.points
+        pygame.draw.polygon(surf, (255, 255, 255), points)
+        pygame.draw.polygon(surf, (255, 0, 0), points, width=2)
+
+
+def batched_draw(bullets, surf):
+    # what ObjectManager.draw does for a layer of bullets, one blits call for all of them
+    batch = []
+    for i in bullets:
+        batch.extend(i.get_blits())
+    sprites.blits(surf, batch)
+
+
+def sprite_draw(args):
+    """draws 500, 2000 and 10000 bullets of each shape rasterized, from the sprite cache one by one and batched"""
+    surf = pygame.display.set_mode((WIDTH, HEIGHT))
+    frames = 20
+    rand = random.Random(0)
+    shapes = {
+        'point': lambda x, y, dx, dy: PointBullet(x, y, dx, dy, r=rand.choice((3, 5))),
+        'line': lambda x, y, dx, dy: LineBullet1(x, y, dx, dy, speed=3),
+        'triangle': lambda x, y, dx, dy: TriangleBullet1(x, y, dx, dy, length=10),
+    }
+    print(f'{"bullets":>8} {"shape":>9} {"raster ms":>10} {"sprite ms":>10} {"batch ms":>10} {"speedup":>8}')
+    for count in (500, 2000, 10000):
+        for shape, make in shapes.items():
+            bullets = [make(rand.uniform(0, WIDTH), rand.uniform(0, HEIGHT), *direction(rand.randrange(360)))
+                       for _ in range(count)]
+            timings = {}
+            for name, draw in (('raster', legacy_draw), ('sprite', lambda bullet, surf: bullet.draw(surf))):
+                t = time.perf_counter()
+                for _ in range(frames):
+                    surf.fill('black')
+                    for i in bullets:
+                        draw(i, surf)
+                timings[name] = (time.perf_counter() - t) * 1000 / frames
+            t = time.perf_counter()
+            for _ in range(frames):
+                surf.fill('black')
+                batched_draw(bullets, surf)
+            timings['batch'] = (time.perf_counter() - t) * 1000 / frames
+            print(f'{count:>8} {shape:>9} {timings["raster"]:10.3f} {timings["sprite"]:10.3f} {timings["batch"]:10.3f} '
+                  f'{timings["raster"] / max(timings["batch"], 1e-9):7.2f}x')
+    print(sprites.sprite.cache_info())
+
+
+def splat_draw(args):
+    """draws a point bullet pool of growing size with blits and with splat.py, and where splatting starts to win"""
+    surf = pygame.display.set_mode((WIDTH, HEIGHT))
+    frames = 20
+    rand = random.Random(0)
+    print(f'{"bullets":>8} {"blit ms":>10} {"splat ms":>10} {"speedup":>8}  pixels')
+    crossover = None
+    for count in (50, 100, 250, 500, 1000, 2000, 5000, 10000, 20000, 50000):
+        pool = PointBulletPool(count)
+        for _ in range(count):
+            pool.emit(rand.uniform(-10, WIDTH + 10), rand.uniform(-10, HEIGHT + 10), [direction(rand.randrange(360))],
+                      r=rand.choice((3, 5)), color=rand.choice(PointBulletPool.COLORS))
+        pool.commit()
+        xs, ys = pool.positions()
+        timings = {}
+        images = {}
+        for name, draw in (('blit', lambda: sprites.blits(surf, pool.blit_rows(xs, ys))),
+                           ('splat', lambda: splat.splat(surf, xs, ys, pool.r[:count], pool.color_id[:count], pool.COLORS))):
+            # best of three rounds, a single one is at the mercy of whatever else the machine does
+            timings[name] = float('inf')
+            for _ in range(3):
+                t = time.perf_counter()
+                for _ in range(frames):
+                    surf.fill('black')
+                    draw()
+                timings[name] = min(timings[name], (time.perf_counter() - t) * 1000 / frames)
+            images[name] = pygame.image.tobytes(surf, 'RGB')
+        if crossover is None and timings['splat'] < timings['blit']:
+            crossover = count
+        print(f'{count:>8} {timings["blit"]:10.3f} {timings["splat"]:10.3f} {timings["blit"] / max(timings["splat"], 1e-9):7.2f}x  '
+              f'{"same" if images["blit"] == images["splat"] else "DIFFERENT"}')
+    print(f'splat wins from {crossover} bullets, the pool switches at splat.MIN_BULLETS = {splat.MIN_BULLETS}')
+
+
+def layer_draw(args):
+    """draws the static background of the framed menus, every frame and from its layer"""
+    surf = pygame.display.set_mode((WIDTH, HEIGHT))
+    frames = 500
+    Globals.set(UPCOMING_LEVEL, 'point')
+    manager = MenuManager()
+    backgrounds = {}
+    for mode in ('home', 'level-select', 'credits', 'help'):
+        manager.switch_mode(mode)
+        backgrounds[mode] = manager.menu.draw_background, manager.menu.layer.draw
+    print(f'{"layer":>14} {"draw us":>10} {"blit us":>10} {"speedup":>8}  pixels')
+    for name, (draw, blit) in backgrounds.items():
+        timings = {}
+        images = {}
+        for key, call in (('draw', draw), ('blit', blit)):
+            timings[key] = float('inf')
+            for _ in range(3):
+                t = time.perf_counter()
+                for _ in range(frames):
+                    call(surf)
+                timings[key] = min(timings[key], (time.perf_counter() - t) * 1e6 / frames)
+            images[key] = pygame.image.tobytes(surf, 'RGB')
+        print(f'{name:>14} {timings["draw"]:10.1f} {timings["blit"]:10.1f} {timings["draw"] / max(timings["blit"], 1e-9):7.2f}x  '
+              f'{"same" if images["draw"] == images["blit"] else "DIFFERENT"}')
+
+
+# differences below this many milliseconds are noise, not regressions
+NOISE_MS = 0.05
+
+
+def percentiles(values):
+    values = sorted(values)
+
+    def at(q):
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    return {'p50': at(0.5), 'p95': at(0.95), 'p99': at(0.99), 'max': values[-1]}
+
+
+def compare(results, baseline, threshold):
+    """(level, phase, stat, baseline ms, current ms) for every percentile slower than the baseline by more than threshold"""
+    regressions = []
+    for level, data in results['levels'].items():
+        base = baseline['levels'].get(level)
+        if base is None:
+            continue
+        for phase, stats in data['phases'].items():
+            old = base['phases'].get(phase)
+            if old is None:
+                continue
+            for key in ('p50', 'p95', 'p99'):
+                if stats[key] > old[key] * (1 + threshold) and stats[key] - old[key] > NOISE_MS:
+                    regressions.append((level, phase, key, old[key], stats[key]))
+    return regressions
+
+
+def levels(args):
+    """
+    replays every level's chart on a virtual clock and reports frame time percentiles per phase
+    with --bot the autopilot plays instead of an invulnerable idle player, its time is not in the phases
+    """
+    results = {'fps': FPS, 'bot': args.bot, 'levels': {}}
+    for level in LEVELS:
+        samples = {phase: [] for phase in (*PHASES, 'frame')}
+        counts = []
+
+        def on_frame(manager):
+            last = manager.profiler.last
+            for phase in PHASES:
+                samples[phase].append(last[phase] * 1000)
+            samples['frame'].append(manager.profiler.total * 1000)
+            pool = manager.object_manager.point_bullets
+            counts.append((Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK),
+                           len(manager.object_manager.objects) + (len(pool) if pool is not None else 0)))
+
+        run = run_level(level, args.seconds, invulnerable=True, on_frame=on_frame, seed=0, bot=args.bot)
+        # object counts over song time, in buckets of 10 seconds
+        buckets = {}
+        for t, count in counts:
+            buckets.setdefault(int(t // 10) * 10, []).append(count)
+        results['levels'][level] = {
+            'frames': run['frames'],
+            'song_time': run['song_time'],
+            'wall_time': run['wall_time'],
+            'bot_time': run['bot_time'],
+            'hits': run['hits'],
+            'phases': {phase: percentiles(values) for phase, values in samples.items()},
+            'objects': [{'time': t, 'mean': sum(c) / len(c), 'max': max(c)} for t, c in sorted(buckets.items())],
+        }
+
+    for level, data in results['levels'].items():
+        print(f'{level}: {data["frames"]} frames, {data["song_time"]:.1f}s of song in {data["wall_time"]:.2f}s')
+        print(f'  {"phase":>18} {"p50":>8} {"p95":>8} {"p99":>8} {"max":>8}  ms')
+        for phase, stats in data['phases'].items():
+            print(f'  {phase:>18} ' + ' '.join(f'{stats[key]:8.3f}' for key in ('p50', 'p95', 'p99', 'max')))
+        print('  objects ' + ' '.join(f'{i["time"]}s:{i["max"]}' for i in data['objects']))
+        if args.bot:
+            print(f'  bot {data["bot_time"] / data["frames"] * 1000:.3f} ms a frame, hit in {data["hits"]} frames')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('bot', False) != args.bot:
+            print(f'warning: {args.compare} was {"" if baseline.get("bot") else "not "}measured with --bot')
+        regressions = compare(results, baseline, args.threshold)
+        for level, phase, key, old, new in regressions:
+            print(f'REGRESSION {level} {phase} {key}: {old:.3f} ms -> {new:.3f} ms')
+        if regressions:
+            sys.exit(1)
+        print(f'no regressions beyond {args.threshold:.0%} of {args.compare}')
+
+
+BENCHMARKS = {
+    'triangle-collision': triangle_collision,
+    'trig': trig,
+    'sprites': sprite_draw,
+    'splat': splat_draw,
+    'layers': layer_draw,
+    'levels': levels,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmarks for the game hot paths')
+    parser.add_argument('benchmark', choices=BENCHMARKS)
+    parser.add_argument('--seconds', type=float, help='song time to replay, 79 by default, the whole song for levels')
+    parser.add_argument('--output', help='write the levels results as json')
+    parser.add_argument('--compare', help='baseline json the levels results are checked against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='relative slowdown flagged as a regression')
+    parser.add_argument('--bot', action='store_true', help='let the autopilot play the levels')
+    args = parser.parse_args()
+    pygame.init()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == '__main__':
+    main()
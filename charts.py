@@ -0,0 +1,256 @@
+"""
+Level charts
+every soundtrack has a declarative chart next to it (assets/sounds/<track>.chart),
+a json list of directives that expand to the timed events the enemies fire.
+The expanded chart is compiled into packed arrays (event times, row kinds,
+direction vectors and speeds) and cached in <track>.chart.bin, keyed by the hash
+of the source, so later launches only memory map the cache and never expand
+the patterns again.
+"""
+
+import hashlib
+import json
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from operator import itemgetter
+from random import Random
+
+from config import ASSETS, WIDTH, HEIGHT
+from trig import direction
+
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+# row kinds
+POINT_BULLET = 0
+LINE_BULLET = 1
+TRIANGLE_BULLET = 2
+POINT_SPREAD = 3
+LINE_SPREAD = 4
+TRIANGLE_LAUNCHER = 5
+MOVE = 6
+LINE_RAY = 7
+ROTATE = 8
+ROTATE_FASTER = 9
+SPIN_BURST = 10
+
+LAUNCHERS = (POINT_SPREAD, LINE_SPREAD, TRIANGLE_LAUNCHER)
+
+EMITTERS = {
+    'point': POINT_BULLET,
+    'line': LINE_BULLET,
+    'triangle': TRIANGLE_BULLET,
+    'point_spread': POINT_SPREAD,
+    'line_spread': LINE_SPREAD,
+    'triangle_launcher': TRIANGLE_LAUNCHER,
+}
+
+SPECIALS = {
+    'move': MOVE,
+    'line_ray': LINE_RAY,
+    'rotate': ROTATE,
+    'rotate_faster': ROTATE_FASTER,
+    'spin_burst': SPIN_BURST,
+}
+
+KIND_NAMES = {kind: name for name, kind in (*EMITTERS.items(), *SPECIALS.items())}
+
+VERSION = 2
+# magic, version, event count, row count, arena width and height, source hash
+HEADER = struct.Struct('=4sIIIII32s')
+
+
+def _direction_rows(kind, angles, speed):
+    return [(kind, *direction(i), speed) for i in angles]
+
+
+def _side_targets(side, count, inset):
+    if side == 'top':
+        return [(WIDTH * (i + 1) / (count + 1), inset) for i in range(count)]
+    elif side == 'bottom':
+        return [(WIDTH * (i + 1) / (count + 1), HEIGHT - inset) for i in range(count)]
+    elif side == 'left':
+        return [(inset, HEIGHT * (i + 1) / (count + 1)) for i in range(count)]
+    elif side == 'right':
+        return [(WIDTH - inset, HEIGHT * (i + 1) / (count + 1)) for i in range(count)]
+    raise ValueError(f'unknown side {side!r}')
+
+
+def expand(source: dict, rng: Random):
+    """expands the chart directives into a time sorted list of (time, rows)"""
+    bullet = EMITTERS[source['bullet']]
+    launcher = EMITTERS[source['launcher']]
+    events = []
+    for directive in source['events']:
+        _type = directive['type']
+        time = directive['time']
+        dt = directive.get('dt', 0)
+        beats = directive.get('beats', 1)
+        speed = directive.get('speed', 1)
+        step = directive.get('step', 0)
+        offset = directive.get('offset', 0)
+        if _type == 'burst':
+            # one ring of bullets, explicit angles or every step degrees
+            angles = directive.get('angles') or range(offset, 360 + offset, step)
+            events.append((time, _direction_rows(bullet, angles, speed)))
+        elif _type == 'bursts':
+            # a ring every dt, turned by offset degrees each beat
+            for i in range(beats):
+                events.append((time + dt * i, _direction_rows(bullet, range(offset * i, 360 + offset * i, step), speed)))
+        elif _type == 'sweep':
+            # single bullets around the circle, each angle fired dt * angle after time
+            for i in range(offset, 360 + offset, step):
+                events.append((time + dt * i, _direction_rows(bullet, [i], speed)))
+        elif _type == 'spiral':
+            # single bullets every dt, turning by step degrees, jitter rolls a random start
+            jitter = directive.get('jitter', 0)
+            start = directive.get('start', 0) + rng.randint(-jitter, jitter)
+            for i in range(beats):
+                events.append((time + dt * i, _direction_rows(bullet, [start + step * i], speed)))
+        elif _type == 'launch':
+            # launchers flying from the enemy to targets given as fractions of the arena
+            targets = [(x * WIDTH, y * HEIGHT) for x, y in directive['targets']]
+            for i in range(beats):
+                events.append((time + dt * i, [(launcher, x, y, 0) for x, y in targets]))
+        elif _type == 'launch_row':
+            # one launcher every dt, spread along a side of the arena
+            for i, (x, y) in enumerate(_side_targets(directive['side'], directive['count'], directive['inset'])):
+                events.append((time + dt * i, [(launcher, x, y, 0)]))
+        elif _type in SPECIALS:
+            events.append((time, [(SPECIALS[_type], 0, 0, speed)]))
+        else:
+            raise ValueError(f'unknown chart directive {_type!r}')
+    # stable sort, events sharing a timestamp keep their chart order
+    events.sort(key=itemgetter(0))
+    return events
+
+
+def compile_chart(source: bytes, digest: bytes):
+    """compiles a chart source into the packed cache layout"""
+    events = expand(json.loads(source), Random(digest))
+    times = array('d')
+    starts = array('I', [0])
+    kinds = array('B')
+    a = array('d')
+    b = array('d')
+    speeds = array('d')
+    for time, rows in events:
+        times.append(time)
+        for kind, x, y, speed in rows:
+            kinds.append(kind)
+            a.append(x)
+            b.append(y)
+            speeds.append(speed)
+        starts.append(len(kinds))
+    header = HEADER.pack(b'DBCH', VERSION, len(times), len(kinds), WIDTH, HEIGHT, digest)
+    # 8 byte columns first so every column stays aligned
+    return b''.join([header, times.tobytes(), a.tobytes(), b.tobytes(), speeds.tobytes(), starts.tobytes(), kinds.tobytes()])
+
+
+class Chart:
+    """
+    A compiled chart, read straight from the cache buffer
+    event i owns rows starts[i] to starts[i + 1], a row is an emitter kind with
+    either a unit direction (a, b) and speed, or a launcher target (a, b)
+    """
+
+    def __init__(self, data):
+        self.data = data
+        view = memoryview(data)
+        _, _, n_events, n_rows, _, _, _ = HEADER.unpack_from(view)
+        offset = HEADER.size
+
+        def column(fmt, count, size):
+            nonlocal offset
+            values = view[offset:offset + count * size].cast(fmt)
+            offset += count * size
+            return values
+
+        self.times = column('d', n_events, 8)
+        self.a = column('d', n_rows, 8)
+        self.b = column('d', n_rows, 8)
+        self.speeds = column('d', n_rows, 8)
+        self.starts = column('I', n_events + 1, 4)
+        self.kinds = column('B', n_rows, 1)
+
+    def __len__(self):
+        return len(self.times)
+
+    def rows(self, event):
+        return range(self.starts[event], self.starts[event + 1])
+
+    def kind(self, event):
+        return self.kinds[self.starts[event]]
+
+
+class ChartCursor:
+    def __init__(self, chart: Chart):
+        self.chart = chart
+        self.index = 0
+
+    def reset(self):
+        self.index = 0
+
+    def advance(self, elapsed):
+        # every event with a timestamp before elapsed that was not returned yet
+        if elapsed is None:
+            return range(0)
+        start = self.index
+        self.index = bisect_left(self.chart.times, elapsed, start)
+        return range(start, self.index)
+
+
+def _read_cache(path, digest):
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return None
+            magic, version, _, _, width, height, cached_digest = HEADER.unpack(header)
+            if (magic, version, width, height, cached_digest) != (b'DBCH', VERSION, WIDTH, HEIGHT, digest):
+                return None
+            if mmap is not None:
+                try:
+                    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    pass
+            f.seek(0)
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cache(path, data):
+    try:
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        # read only installs just compile in memory every launch
+        pass
+
+
+_charts: dict[str, Chart] = {}
+
+
+def load_chart(track) -> Chart:
+    # charts are loaded once per process and shared by every enemy and reset
+    try:
+        return _charts[track]
+    except KeyError:
+        pass
+    path = os.path.join(ASSETS, 'sounds', f'{track}.chart')
+    with open(path, 'rb') as f:
+        source = f.read()
+    digest = hashlib.sha256(source).digest()
+    cache = path + '.bin'
+    data = _read_cache(cache, digest)
+    if data is None:
+        data = compile_chart(source, digest)
+        _write_cache(cache, data)
+    chart = _charts[track] = Chart(data)
+    return chart
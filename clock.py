@@ -0,0 +1,92 @@
+"""
+Game clock
+everything that keeps time (timers, the soundtrack position, enemy movement)
+reads the current clock, which the game loop samples once per frame.
+RealClock follows the wall clock, VirtualClock only moves when the loop steps it
+and ScaledClock runs the wall clock faster or slower, e.g. for fast forward.
+The game runs on a VirtualClock stepped 1 / FPS per update, FixedStep decides
+how many updates each rendered frame needs to keep up with the wall clock
+"""
+
+import time
+
+from config import FPS
+
+
+class RealClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def sample(self):
+        self.now = time.time()
+        return self.now
+
+
+class VirtualClock:
+    def __init__(self, start=0.0, step=1 / FPS):
+        self.now = start
+        self.step = step
+
+    def sample(self):
+        self.now += self.step
+        return self.now
+
+
+class ScaledClock:
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self._wall = time.time()
+        self.now = self._wall
+
+    def sample(self):
+        wall = time.time()
+        self.now += (wall - self._wall) * self.scale
+        self._wall = wall
+        return self.now
+
+
+class FixedStep:
+    """
+    Accumulates wall time and hands it out as whole simulation steps
+    alpha is how far the wall clock is into the next step, for drawing between steps
+    """
+
+    def __init__(self, step=1 / FPS, max_steps=5):
+        self.step = step
+        # when rendering falls further behind than this the game slows down instead of stalling
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self._wall = time.perf_counter()
+
+    def advance(self):
+        wall = time.perf_counter()
+        self.accumulator += wall - self._wall
+        self._wall = wall
+        steps = int(self.accumulator / self.step)
+        self.accumulator -= steps * self.step
+        if steps > self.max_steps:
+            steps = self.max_steps
+        self.alpha = self.accumulator / self.step
+        return steps
+
+
+_clock = RealClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock):
+    global _clock
+    _clock = clock
+
+
+def now():
+    # time of the current frame, the same value until the next sample
+    return _clock.now
+
+
+def sample():
+    return _clock.sample()
@@ -0,0 +1,175 @@
+"""
+Collision helpers for the ObjectManager
+broad phase bucketing and narrow phase tests that work on
+plain numbers instead of building pygame objects per check
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CODE_LEFT = 1
+CODE_RIGHT = 2
+CODE_TOP = 4
+CODE_BOTTOM = 8
+
+
+class SpatialHash:
+    """
+    Uniform grid broad phase
+    objects are bucketed by the cells their bounds overlap, so a query only
+    looks at the objects around the queried rect instead of the whole arena
+    """
+
+    def __init__(self, cell_size=64, max_cells=16):
+        self.cell_size = cell_size
+        # objects covering more cells than this (full length rays) are kept
+        # aside and returned by every query instead of filling the grid
+        self.max_cells = max_cells
+        self.cells: dict[tuple[int, int], list] = {}
+        self.oversized = []
+
+    def clear(self):
+        self.cells.clear()
+        self.oversized.clear()
+
+    def _cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        return int(left // size), int(top // size), int(right // size), int(bottom // size)
+
+    def insert(self, _object, bounds):
+        size = self.cell_size
+        left, top, right, bottom = bounds
+        x1 = int(left // size)
+        y1 = int(top // size)
+        x2 = int(right // size)
+        y2 = int(bottom // size)
+        cells = self.cells
+        if x1 == x2 and y1 == y2:
+            # most bullets fit in a single cell
+            bucket = cells.get((x1, y1))
+            if bucket is None:
+                cells[x1, y1] = [_object]
+            else:
+                bucket.append(_object)
+            return
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > self.max_cells:
+            self.oversized.append(_object)
+            return
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[cx, cy] = [_object]
+                else:
+                    bucket.append(_object)
+
+    def query(self, bounds):
+        x1, y1, x2, y2 = self._cell_range(*bounds)
+        cells = self.cells
+        found = {}
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(dict.fromkeys(bucket))
+        found.update(dict.fromkeys(self.oversized))
+        return list(found)
+
+
+def bounds_overlap(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _out_codes(x, y, left, top, right, bottom):
+    return (numpy.where(y < top, CODE_TOP, numpy.where(y > bottom, CODE_BOTTOM, 0)) |
+            numpy.where(x < left, CODE_LEFT, numpy.where(x > right, CODE_RIGHT, 0)))
+
+
+def _div(a, b):
+    # integer division truncating towards zero, like C
+    b = numpy.where(b == 0, 1, b)
+    q = numpy.abs(a) // numpy.abs(b)
+    return numpy.where((a < 0) != (b < 0), -q, q)
+
+
+def clip_segments(rect, x1, y1, x2, y2):
+    """
+    Vectorized pygame.Rect.clipline
+    x1, y1, x2, y2 are arrays of segment end points, returns a bool array of
+    the segments clipline would clip. clipline truncates the points to ints and
+    runs SDL's integer Cohen-Sutherland clipper, which is replayed here step by
+    step for all segments at once so the results match it exactly
+    """
+    x1 = numpy.asarray(x1).astype(numpy.int64)
+    y1 = numpy.asarray(y1).astype(numpy.int64)
+    x2 = numpy.asarray(x2).astype(numpy.int64)
+    y2 = numpy.asarray(y2).astype(numpy.int64)
+    result = numpy.zeros(len(x1), bool)
+    if rect.w <= 0 or rect.h <= 0 or not len(x1):
+        return result
+    left, top = rect.x, rect.y
+    right, bottom = rect.x + rect.w - 1, rect.y + rect.h - 1
+
+    # segments completely to one side of the rect
+    outside = (((x1 < left) & (x2 < left)) | ((x1 > right) & (x2 > right)) |
+               ((y1 < top) & (y2 < top)) | ((y1 > bottom) & (y2 > bottom)))
+    # everything else is a hit if it lies inside or is horizontal / vertical
+    result = ~outside
+    pending = numpy.flatnonzero(~outside & (x1 != x2) & (y1 != y2))
+    x1, y1, x2, y2 = x1[pending], y1[pending], x2[pending], y2[pending]
+    code1 = _out_codes(x1, y1, left, top, right, bottom)
+    code2 = _out_codes(x2, y2, left, top, right, bottom)
+    while len(pending):
+        done = (code1 == 0) & (code2 == 0)
+        rejected = (code1 & code2) != 0
+        result[pending[rejected]] = False
+        keep = ~(done | rejected)
+        pending = pending[keep]
+        x1, y1, x2, y2, code1, code2 = x1[keep], y1[keep], x2[keep], y2[keep], code1[keep], code2[keep]
+        if not len(pending):
+            break
+        # clip the first point that is still outside, one rect edge at a time
+        first = code1 != 0
+        code = numpy.where(first, code1, code2)
+        vertical = (code & (CODE_TOP | CODE_BOTTOM)) != 0
+        y = numpy.where(code & CODE_TOP, top, bottom)
+        x = numpy.where(code & CODE_LEFT, left, right)
+        x = numpy.where(vertical, x1 + _div((x2 - x1) * (y - y1), y2 - y1), x)
+        y = numpy.where(vertical, y, y1 + _div((y2 - y1) * (x - x1), x2 - x1))
+        code = _out_codes(x, y, left, top, right, bottom)
+        x1 = numpy.where(first, x, x1)
+        y1 = numpy.where(first, y, y1)
+        code1 = numpy.where(first, code, code1)
+        x2 = numpy.where(first, x2, x)
+        y2 = numpy.where(first, y2, y)
+        code2 = numpy.where(first, code2, code)
+    return result
+
+
+def triangle_collides_rect(points, rect):
+    """
+    Separating axis test between a triangle and a pygame.Rect
+    the rect covers [left, right) like clipline does once it truncates float points
+    """
+    left, top = rect.x, rect.y
+    right, bottom = left + rect.w, top + rect.h
+    (ax, ay), (bx, by), (cx, cy) = points
+    # axes of the rect
+    if max(ax, bx, cx) < left or min(ax, bx, cx) >= right:
+        return False
+    if max(ay, by, cy) < top or min(ay, by, cy) >= bottom:
+        return False
+    # normals of the triangle edges
+    for px, py, qx, qy, ox, oy in ((ax, ay, bx, by, cx, cy), (bx, by, cx, cy, ax, ay), (cx, cy, ax, ay, bx, by)):
+        nx = qy - py
+        ny = px - qx
+        d = nx * px + ny * py
+        # the edge projects to 0 and the opposite vertex to o
+        o = nx * ox + ny * oy - d
+        low = min(nx * left, nx * right) + min(ny * top, ny * bottom) - d
+        high = max(nx * left, nx * right) + max(ny * top, ny * bottom) - d
+        if high < min(0, o) or low > max(0, o):
+            return False
+    return True
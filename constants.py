@@ -10,3 +10,5 @@ MUSIC_INIT = 'music-init'
 SOUND_VALUE = 'sound-value'
 ELAPSED_TIME_FOR_SOUNDTRACK = 'sound-track-elapsed-time'
 TOTAL_DURATION_OF_SOUNDTRACK = 'total-duration-of-soundtrack'
+
+DIRTY_RECTS = 'dirty-rects'
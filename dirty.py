@@ -0,0 +1,67 @@
+"""
+Dirty rect display updates
+every draw reports the rects it changed, None when it can't tell. A region has to be
+presented again when something was drawn there this frame or the last one, where it
+has to be erased from. The rects are snapped to TILE sized tiles and merged into runs,
+past MAX_AREA of the screen presenting the whole frame is cheaper than the bookkeeping
+"""
+
+import pygame
+
+from config import WIDTH, HEIGHT
+
+TILE = 32
+# share of the screen past which the whole frame is presented
+MAX_AREA = 0.5
+
+
+def note(rects: list, changed):
+    """adds what a draw returned to rects, a rect, a list of them or None when it changed anything"""
+    if rects is None or changed is None:
+        return None
+    if isinstance(changed, list):
+        rects.extend(changed)
+    else:
+        rects.append(changed)
+    return rects
+
+
+def merge(rects, size=(WIDTH, HEIGHT)):
+    """rects covering the tiles rects touch, one per run of tiles, None when they cover more than MAX_AREA"""
+    columns = -(-size[0] // TILE)
+    rows = -(-size[1] // TILE)
+    tiles = bytearray(columns * rows)
+    for left, top, width, height in rects:
+        if width <= 0 or height <= 0:
+            continue
+        x1 = max(left // TILE, 0)
+        x2 = min((left + width - 1) // TILE, columns - 1)
+        if x1 > x2:
+            continue
+        for row in range(max(top // TILE, 0), min((top + height - 1) // TILE, rows - 1) + 1):
+            start = row * columns
+            tiles[start + x1:start + x2 + 1] = b'\x01' * (x2 - x1 + 1)
+    if tiles.count(1) > MAX_AREA * columns * rows:
+        return None
+    screen = pygame.Rect(0, 0, *size)
+    merged = []
+    # runs spanning the same columns on consecutive rows grow into one rect
+    above = {}
+    for row in range(rows):
+        line = tiles[row * columns:(row + 1) * columns]
+        runs = {}
+        x = line.find(1)
+        while x != -1:
+            end = line.find(0, x)
+            if end == -1:
+                end = columns
+            rect = above.get((x, end))
+            if rect is None:
+                rect = pygame.Rect(x * TILE, row * TILE, (end - x) * TILE, TILE)
+                merged.append(rect)
+            else:
+                rect.height += TILE
+            runs[x, end] = rect
+            x = line.find(1, end)
+        above = runs
+    return [rect.clip(screen) for rect in merged]
@@ -0,0 +1,107 @@
+"""
+Level validation farm
+plays every combination of level, seed, collision mode and player strategy headless
+across a process pool and sums the runs up in one report, e.g.
+python farm.py --seeds 8 --workers 8 --output farm.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from benchmark import percentiles
+from headless import LEVELS, run_level
+
+# easy turns collisions off like the in game toggle, pro is the normal game
+MODES = ('pro', 'easy')
+# idle leaves the player where it spawns, autopilot dodges
+STRATEGIES = ('idle', 'autopilot')
+
+
+def simulate(level, seed, mode, strategy, seconds=None, draw=False):
+    """one run, called in a worker process, returns its result with per frame stats"""
+    frame_ms = []
+
+    def on_frame(manager):
+        frame_ms.append(manager.profiler.total * 1000)
+
+    cpu = time.process_time()
+    result = run_level(level, seconds, draw=draw, easy=mode == 'easy', on_frame=on_frame,
+                       seed=seed, bot=strategy == 'autopilot')
+    result.update(mode=mode, strategy=strategy, frame_ms=percentiles(frame_ms), cpu_time=time.process_time() - cpu)
+    result['death'] = result['song_time'] if result['outcome'] == 'died' else None
+    return result
+
+
+def summarize(runs):
+    groups = {}
+    for run in runs:
+        groups.setdefault((run['level'], run['mode'], run['strategy']), []).append(run)
+    summary = []
+    for (level, mode, strategy), group in sorted(groups.items()):
+        deaths = sorted(run['death'] for run in group if run['death'] is not None)
+        summary.append({
+            'level': level,
+            'mode': mode,
+            'strategy': strategy,
+            'runs': len(group),
+            'survival': 1 - len(deaths) / len(group),
+            'deaths': deaths,
+            'peak_objects': max(run['peak_objects'] + run['peak_point_bullets'] for run in group),
+            'frame_p50': sum(run['frame_ms']['p50'] for run in group) / len(group),
+            'frame_p95': sum(run['frame_ms']['p95'] for run in group) / len(group),
+            'frame_max': max(run['frame_ms']['max'] for run in group),
+        })
+    return summary
+
+
+def report(summary, wall, cpu, workers):
+    print(f'{"level":>9} {"mode":>5} {"strategy":>9} {"runs":>5} {"survival":>9} {"peak":>6} '
+          f'{"p50 ms":>7} {"p95 ms":>7} {"max ms":>7}  deaths (s)')
+    for row in summary:
+        deaths = ' '.join(f'{i:.1f}' for i in row['deaths'][:8])
+        if len(row['deaths']) > 8:
+            deaths += ' ...'
+        print(f'{row["level"]:>9} {row["mode"]:>5} {row["strategy"]:>9} {row["runs"]:>5} {row["survival"]:>9.0%} '
+              f'{row["peak_objects"]:>6} {row["frame_p50"]:>7.3f} {row["frame_p95"]:>7.3f} {row["frame_max"]:>7.3f}  {deaths}')
+    print(f'{cpu:.1f}s of cpu in {wall:.1f}s on {workers} workers, {cpu / wall if wall else 0:.1f}x parallel')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='play many headless runs in parallel and report on them')
+    parser.add_argument('--levels', nargs='+', choices=LEVELS, default=LEVELS)
+    parser.add_argument('--seeds', type=int, default=4, help='seeds 0 to N - 1 are played')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument('--seconds', type=float, help='stop every run after this much song time')
+    parser.add_argument('--draw', action='store_true', help='render every frame, slower but frame times include drawing')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='processes, all cores by default')
+    parser.add_argument('--output', help='write every run and the summary as json')
+    args = parser.parse_args()
+
+    jobs = list(itertools.product(args.levels, range(args.seeds), args.modes, args.strategies))
+    runs = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers) as pool:
+        futures = [pool.submit(simulate, *job, seconds=args.seconds, draw=args.draw) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            run = future.result()
+            runs.append(run)
+            print(f'[{done}/{len(jobs)}] {run["level"]} seed {run["seed"]} {run["mode"]} {run["strategy"]}: '
+                  f'{run["outcome"]} at {run["song_time"]:.1f}s')
+    wall = time.perf_counter() - start
+    # the runs' own cpu time, so pool startup and idle workers show up as lost scaling
+    cpu = sum(run['cpu_time'] for run in runs)
+
+    summary = summarize(runs)
+    report(summary, wall, cpu, args.workers)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'runs': runs, 'summary': summary, 'wall_time': wall, 'workers': args.workers}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
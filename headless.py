@@ -0,0 +1,171 @@
+"""
+Headless level runner
+plays a level under SDL's dummy drivers on a virtual clock, as fast as the CPU allows,
+e.g. python headless.py triangle --no-draw
+runs can be recorded with --record and played back with --replay, which gives
+the same simulation on every version of the game, so frame times and outcomes compare.
+--seed fixes the random streams, replays use the seed they were recorded with.
+--bot hands the controls to the autopilot, whose cpu time is kept out of the frame
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+# importing the game sets up pygame and the Globals defaults
+import main as _game  # noqa: F401
+import clock
+import replay
+from autopilot import Autopilot
+import rng
+import tracing
+from config import *
+from constants import *
+from menu import MenuManager
+
+LEVELS = ('point', 'line', 'triangle')
+
+
+def run_level(level, seconds=None, draw=True, easy=False, invulnerable=False, on_frame=None,
+              record_to=None, replay_from=None, seed=None, bot=False):
+    """
+    runs level until the song ends, the player dies or seconds of song time passed
+    easy turns collisions off like the in game toggle, invulnerable keeps checking
+    them but only counts the hits, on_frame(manager) is called after every frame.
+    record_to logs the input of the run, replay_from feeds a recorded run back in.
+    seed=None picks a fresh seed, the one used ends up in the result.
+    bot lets the autopilot play, its time is reported as bot_time and left out of wall_time
+    """
+    clock.set_clock(clock.VirtualClock(step=1 / FPS))
+    rng.seed(seed)
+    source = None
+    autopilot = Autopilot() if bot and replay_from is None else None
+    if replay_from is not None:
+        source = replay.play(replay_from)
+        if source.level != level:
+            raise ValueError(f'{replay_from} is a recording of {source.level or "the menus"}, not {level}')
+    elif record_to is not None:
+        source = replay.record(record_to, level, autopilot)
+    elif autopilot is not None:
+        source = autopilot
+        replay.set_source(autopilot)
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    manager = MenuManager()
+    manager.switch_mode(level)
+    object_manager = manager.object_manager
+    if autopilot is not None:
+        autopilot.object_manager = object_manager
+    object_manager.collision_enabled = not easy
+    duration = Globals.get(TOTAL_DURATION_OF_SOUNDTRACK)
+    limit = min(duration, seconds) if seconds is not None else duration
+
+    frames = 0
+    peak = 0
+    peak_point_bullets = 0
+    hits = 0
+    first_hit = None
+    outcome = 'cleared'
+    elapsed = 0.0
+    start = time.perf_counter()
+    while True:
+        clock.sample()
+        if autopilot is not None:
+            autopilot.think()
+        if source is not None:
+            if getattr(source, 'finished', False):
+                outcome = 'replayed'
+                break
+            manager.update(replay.get_events())
+        else:
+            manager.update([])
+        if draw:
+            manager.draw(screen)
+        frames += 1
+        elapsed = Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK)
+        if on_frame is not None:
+            on_frame(manager)
+        peak = max(peak, len(object_manager.objects))
+        if object_manager.point_bullets is not None:
+            peak_point_bullets = max(peak_point_bullets, len(object_manager.point_bullets))
+        player = object_manager.player
+        if player and not player.alive:
+            hits += 1
+            if first_hit is None:
+                first_hit = elapsed
+            if not invulnerable:
+                outcome = 'died'
+                break
+            player.alive = True
+        if manager.mode != level:
+            break
+        if elapsed >= limit:
+            if limit < duration:
+                outcome = 'survived'
+            break
+    bot_time = autopilot.time if autopilot is not None else 0.0
+    wall = time.perf_counter() - start - bot_time
+    if source is not None:
+        if record_to is not None and replay_from is None:
+            source.close()
+        replay.set_source(replay.LiveInput())
+    return {
+        'level': level,
+        'seed': rng.get_seed(),
+        'outcome': outcome,
+        'frames': frames,
+        'song_time': elapsed,
+        'wall_time': wall,
+        'speed': elapsed / wall if wall else 0.0,
+        'peak_objects': peak,
+        'peak_point_bullets': peak_point_bullets,
+        'hits': hits,
+        'first_hit': first_hit,
+        'bot_time': bot_time,
+    }
+
+
+def report(result):
+    print(f'{result["level"]}: {result["outcome"]} at {result["song_time"]:.2f}s of song time')
+    print(f'  seed         {result["seed"]}')
+    print(f'  frames       {result["frames"]}')
+    print(f'  wall time    {result["wall_time"]:.2f}s ({result["speed"]:.1f} simulated seconds per second)')
+    print(f'  peak objects {result["peak_objects"]} (+{result["peak_point_bullets"]} pooled point bullets)')
+    if result['hits']:
+        print(f'  hits         {result["hits"]} frames, first at {result["first_hit"]:.2f}s')
+    else:
+        print('  hits         none')
+    if result['bot_time']:
+        print(f'  bot time     {result["bot_time"]:.2f}s ({result["bot_time"] / result["frames"] * 1000:.2f} ms a frame, not in wall time)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='play a level headless, faster than real time')
+    parser.add_argument('level', nargs='?', choices=LEVELS, help='defaults to the level of --replay')
+    parser.add_argument('--seconds', type=float, help='stop after this much song time')
+    parser.add_argument('--no-draw', action='store_true', help='skip rendering, only simulate')
+    parser.add_argument('--easy', action='store_true', help='disable collisions like the in game easy mode')
+    parser.add_argument('--invulnerable', action='store_true', help='count collisions without dying')
+    parser.add_argument('--trace', metavar='PATH', help='write a chrome trace of the run, open it in ui.perfetto.dev')
+    parser.add_argument('--bot', action='store_true', help='let the autopilot dodge')
+    parser.add_argument('--seed', type=int, help='seed for the random streams, random by default')
+    parser.add_argument('--record', metavar='PATH', help='record the input of the run')
+    parser.add_argument('--replay', metavar='PATH', help='play back recorded input, pass the same flags as the recording')
+    args = parser.parse_args()
+    level = args.level
+    if args.replay and level is None:
+        level = replay.Replayer(args.replay).level
+    if level not in LEVELS:
+        parser.error('a level is required unless --replay names a recorded level')
+    if args.trace:
+        tracing.enable(args.trace)
+    report(run_level(level, args.seconds, draw=not args.no_draw, easy=args.easy, invulnerable=args.invulnerable,
+                     record_to=args.record, replay_from=args.replay, seed=args.seed, bot=args.bot))
+
+
+if __name__ == '__main__':
+    main()
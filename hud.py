@@ -0,0 +1,143 @@
+"""
+Performance overlay
+toggled with F3, shows fps, a frame time graph split by phase, live object
+counts and the hit rates of the render caches in utils
+"""
+
+from collections import Counter
+from time import perf_counter
+
+import pygame
+
+from config import FPS
+from profiler import PHASES
+from sprites import sprite
+from utils import font, load_image, text
+
+# one hue per manager, updates are drawn lighter than draws
+SUBSYSTEMS = {
+    'menu': (90, 160, 255),
+    'objects': (255, 90, 90),
+    'transition': (255, 200, 60),
+    'subtitles': (120, 230, 120),
+}
+PHASE_COLORS = {
+    phase: tuple(min(255, c + 90) for c in SUBSYSTEMS[phase.split('.')[0]]) if phase.endswith('update')
+    else SUBSYSTEMS[phase.split('.')[0]]
+    for phase in PHASES
+}
+CACHES = {'text cache': text, 'font cache': font, 'image cache': load_image, 'sprite cache': sprite}
+
+
+class PerformanceHUD:
+    """
+    The panel and labels are rendered once, the numbers a few times per second,
+    and the graph scrolls by a single column every frame
+    """
+    WIDTH = 300
+    LINE = 16
+    GRAPH_HEIGHT = 50
+    MAX_CLASSES = 6
+    # seconds between number refreshes
+    REFRESH = 0.25
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.visible = False
+        self.font = pygame.font.Font(None, 18)
+        self.fps = 0.0
+        self.smoothed_fps = 0.0
+        self._last_frame = None
+        self._last_refresh = 0.0
+
+        line = self.LINE
+        self.graph_y = 3 * line + 4
+        self.caches_y = self.graph_y + self.GRAPH_HEIGHT + line + 8
+        self.objects_y = self.caches_y + len(CACHES) * line
+        height = self.objects_y + (self.MAX_CLASSES + 2) * line
+
+        self.panel = pygame.Surface((self.WIDTH, height), pygame.SRCALPHA)
+        self.panel.fill((0, 0, 0, 170))
+        for i, label in enumerate(('fps', 'smoothed fps', 'frame ms')):
+            self.panel.blit(self.render(label), (6, 4 + i * line))
+        x = 6
+        for name, color in SUBSYSTEMS.items():
+            pygame.draw.rect(self.panel, color, (x, self.graph_y + self.GRAPH_HEIGHT + 6, 8, 8))
+            label = self.render(name)
+            self.panel.blit(label, (x + 10, self.graph_y + self.GRAPH_HEIGHT + 4))
+            x += label.get_width() + 16
+        for i, label in enumerate(CACHES):
+            self.panel.blit(self.render(label), (6, self.caches_y + i * line))
+        self.panel.blit(self.render('objects'), (6, self.objects_y))
+
+        self.numbers = pygame.Surface((self.WIDTH, height), pygame.SRCALPHA)
+        self.graph = pygame.Surface((self.WIDTH - 12, self.GRAPH_HEIGHT))
+        self.graph.fill((0, 0, 0))
+        # the graph spans two frame budgets, the line marks one
+        self.ms_scale = self.GRAPH_HEIGHT / (2000 / FPS)
+
+    def render(self, label, color=(255, 255, 255)):
+        return self.font.render(label, True, color)
+
+    def toggle(self):
+        self.visible = not self.visible
+        self._last_frame = None
+
+    def refresh(self):
+        line = self.LINE
+        numbers = self.numbers
+        numbers.fill((0, 0, 0, 0))
+        x = 150
+        values = (f'{self.fps:.0f}', f'{self.smoothed_fps:.1f}', f'{self.manager.profiler.total * 1000:.2f}')
+        for i, value in enumerate(values):
+            numbers.blit(self.render(value), (x, 4 + i * line))
+        for i, cached in enumerate(CACHES.values()):
+            info = cached.cache_info()
+            calls = info.hits + info.misses
+            rate = info.hits / calls if calls else 0.0
+            numbers.blit(self.render(f'{rate:.1%} of {calls}'), (x, self.caches_y + i * line))
+
+        object_manager = self.manager.object_manager
+        pool = object_manager.point_bullets
+        # the pool stands in for its bullets
+        counts = Counter(type(i).__name__ for i in object_manager.objects if i is not pool)
+        if pool:
+            counts['PointBullet'] += len(pool)
+        numbers.blit(self.render(f'{sum(counts.values())}'), (x, self.objects_y))
+        for i, (name, count) in enumerate(counts.most_common(self.MAX_CLASSES)):
+            numbers.blit(self.render(f'{count:>5}  {name}', (190, 190, 190)), (14, self.objects_y + (i + 1) * line))
+
+    def update_graph(self):
+        graph = self.graph
+        w, h = graph.get_size()
+        graph.scroll(-1, 0)
+        graph.fill((0, 0, 0), (w - 1, 0, 1, h))
+        y = h
+        for phase, value in self.manager.profiler.last.items():
+            size = value * 1000 * self.ms_scale
+            if size >= 0.5:
+                top = max(0, round(y - size))
+                graph.fill(PHASE_COLORS[phase], (w - 1, top, 1, round(y) - top))
+                y -= size
+        graph.set_at((w - 1, h // 2), (255, 255, 255))
+
+    def draw(self, surf: pygame.Surface):
+        # returns the rects it changed
+        if not self.visible:
+            return []
+        now = perf_counter()
+        if self._last_frame is not None:
+            dt = now - self._last_frame
+            self.fps = 1 / dt if dt > 0 else 0.0
+            if not self.smoothed_fps:
+                self.smoothed_fps = self.fps
+            self.smoothed_fps += (self.fps - self.smoothed_fps) * 0.05
+        self._last_frame = now
+        self.update_graph()
+        if now - self._last_refresh >= self.REFRESH:
+            self._last_refresh = now
+            self.refresh()
+        panel = surf.blit(self.panel, (8, 8))
+        graph = surf.blit(self.graph, (14, 8 + self.graph_y))
+        numbers = surf.blit(self.numbers, (8, 8))
+        return [panel, graph, numbers]
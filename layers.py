@@ -0,0 +1,44 @@
+"""
+Static layers
+the parts of a menu that only change on a reset or a display change, its frame, title and help text,
+are drawn once into a converted surface and blitted in one call, whatever moves is drawn on top of it
+every frame. invalidate() rebuilds a layer on its next draw, layers.invalidate() rebuilds all of them,
+the display does that when its mode changes
+"""
+
+import pygame
+
+# bumped by invalidate(), layers built before it are rebuilt
+generation = 0
+
+
+def invalidate():
+    global generation
+    generation += 1
+
+
+class Layer:
+    def __init__(self, build):
+        # build(surface) draws the layer onto a surface the size of the target
+        self.build = build
+        self.surface = None
+        # (target size, generation) the surface was built for
+        self.built = None
+
+    def invalidate(self):
+        self.surface = None
+
+    def get_surface(self, surf: pygame.Surface):
+        built = surf.get_size(), generation
+        if self.surface is None or self.built != built:
+            surface = pygame.Surface(surf.get_size())
+            # the pixel format of the display blits without converting every pixel
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            self.build(surface)
+            self.surface = surface
+            self.built = built
+        return self.surface
+
+    def draw(self, surf: pygame.Surface):
+        return surf.blit(self.get_surface(surf), (0, 0))
@@ -1,4 +1,13 @@
 import asyncio
+import os
+from time import perf_counter, time
+
+import clock
+import dirty
+import layers
+import replay
+import rng
+import tracing
 from config import *
 from constants import *
 from menu import MenuManager
@@ -30,6 +39,8 @@ Globals.set(MUSIC_INIT, music_init)
 Globals.set(SOUND_VALUE, 0)
 Globals.set(ELAPSED_TIME_FOR_SOUNDTRACK, 0)
 Globals.set(TOTAL_DURATION_OF_SOUNDTRACK, 0)
+# only the parts of the screen that changed are presented, DIMENSION_BEATS_DIRTY_RECTS=0 presents every frame whole
+Globals.set(DIRTY_RECTS, os.environ.get('DIMENSION_BEATS_DIRTY_RECTS', '1') != '0')
 
 
 # TODO add subtitle manager
@@ -39,39 +50,82 @@ class Game:
     def __init__(self):
         self.full_screen = True
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN | pygame.SCALED)
+        if os.environ.get('DIMENSION_BEATS_SEED'):
+            rng.seed(int(os.environ['DIMENSION_BEATS_SEED']))
+        # the game time moves exactly one step per update, whatever the frame rate
+        clock.set_clock(clock.VirtualClock(time()))
+        # input has to be redirected before anything reads the clock, a replay brings its own clock and seed
+        if os.environ.get('DIMENSION_BEATS_REPLAY'):
+            replay.play(os.environ['DIMENSION_BEATS_REPLAY'])
+        elif os.environ.get('DIMENSION_BEATS_RECORD'):
+            replay.record(os.environ['DIMENSION_BEATS_RECORD'])
         self.manager = MenuManager()
         self.clock = pygame.time.Clock()
+        self.stepper = clock.FixedStep()
+        # rects changed by the last presented frame, None when all of it was presented
+        self.presented = None
+
+    def handle_events(self, events):
+        for e in events:
+            if e.type == pygame.QUIT:
+                sys.exit(0)
+            if e.type == pygame.KEYDOWN:
+                if e.key == pygame.K_ESCAPE:
+                    if self.manager.mode == 'home':
+                        if Globals.get(FIRST_TIME_PLAYED):
+                            sys.exit(0)
+                    else:
+                        self.manager.transition_manager.set_transition('fade')
+                        self.manager.subtitle_manager.clear()
+                        if self.manager.mode not in ('point', 'line', 'triangle'):
+                            self.manager.switch_mode('home', reset=False, transition=True)
+                    # sys.exit(0)
+                if e.key == pygame.K_f:
+                    self.full_screen = not self.full_screen
+                    if self.full_screen:
+                        self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN | pygame.SCALED)
+                    else:
+                        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+                    # layers are converted to the pixel format of the old display
+                    layers.invalidate()
+                    self.presented = None
+
+    def present(self):
+        # a region has to be presented when something was drawn there this frame or the last,
+        # anything that can't tell where it drew, a running transition or too many rects present it all
+        drawn = self.manager.get_dirty_rects() if Globals.get(DIRTY_RECTS) else None
+        rects = None
+        if drawn is not None and self.presented is not None:
+            rects = dirty.merge(self.presented + drawn)
+        self.presented = drawn
+        if rects is None:
+            pygame.display.update()
+        elif rects:
+            pygame.display.update(rects)
 
     async def run(self):
         while True:
-            events = pygame.event.get()
-            for e in events:
-                if e.type == pygame.QUIT:
-                    sys.exit(0)
-                if e.type == pygame.KEYDOWN:
-                    if e.key == pygame.K_ESCAPE:
-                        if self.manager.mode == 'home':
-                            if Globals.get(FIRST_TIME_PLAYED):
-                                sys.exit(0)
-                        else:
-                            self.manager.transition_manager.set_transition('fade')
-                            self.manager.subtitle_manager.clear()
-                            if self.manager.mode not in ('point', 'line', 'triangle'):
-                                self.manager.switch_mode('home', reset=False, transition=True)
-                        # sys.exit(0)
-                    if e.key == pygame.K_f:
-                        self.full_screen = not self.full_screen
-                        if self.full_screen:
-                            self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN | pygame.SCALED)
-                        else:
-                            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-            # self.screen.fill('black')
-            self.manager.update(events)
-            self.manager.draw(self.screen)
+            frame = t = perf_counter()
+            # the simulation runs in fixed steps, as many as the wall clock asks for,
+            # so a slow frame is caught up on instead of slowing the game down
+            for _ in range(self.stepper.advance()):
+                # everything reads the step time sampled here
+                clock.sample()
+                events = replay.get_events()
+                self.handle_events(events)
+                t = tracing.lap('events', t)
+                # self.screen.fill('black')
+                self.manager.update(events)
+                t = tracing.lap('update', t)
+            self.manager.draw(self.screen, self.stepper.alpha)
             pygame.draw.rect(self.screen, 'white', self.screen.get_rect(), 3)
-            pygame.display.update()
+            t = tracing.lap('draw', t)
+            self.present()
+            t = tracing.lap('display', t)
             # print(self.clock.get_fps())
             self.clock.tick(FPS)
+            tracing.lap('tick', t)
+            tracing.lap('frame', frame)
             await asyncio.sleep(0)
 
 if __name__ == '__main__':
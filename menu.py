@@ -1,11 +1,20 @@
-import random
 import sys
 
+import dirty
+import layers
+import replay
+import rng
+
+from hud import PerformanceHUD
 from objects import *
+from profiler import FrameProfiler
 from sounds import SoundManager
 from subtitles import SubtitleManager, Subtitle, get_typed_subtitles
 from transition import TransitionManager
 
+# the song progress bar at the top of the level scenes, besides the objects the only thing in them that moves
+PROGRESS_RECT = pygame.Rect(WIDTH // 2 - 200, 20, 400, 10)
+
 
 class Menu:
     """
@@ -20,6 +29,10 @@ class Menu:
         self.manager.object_manager.clear()
         Globals.set(PREVIOUS_LEVEL, Globals.get(CURRENT_LEVEL))
         Globals.set(CURRENT_LEVEL, self.name)
+        self.drawn_state = None
+        # the frame and title, built on the first draw after a reset. menus that show no more than
+        # a fill and a line of text draw them directly, a whole screen blit costs more than that
+        self.layer = layers.Layer(self.draw_background)
 
     def reset(self):
         self.__init__(self.manager, self.name)
@@ -27,12 +40,28 @@ class Menu:
     def update(self, events: list[pygame.event.Event]):
         pass
 
-    def draw(self, surf: pygame.Surface):
+    def draw_background(self, surf: pygame.Surface):
         surf.fill(self.background)
         pygame.draw.rect(surf, 'white', surf.get_rect().inflate(-20, -200).move(0, 100 - 10), 3)
         # pygame.draw.rect(surf, 'white', surf.get_rect().inflate(-20, -HEIGHT + 170).move(0, -HEIGHT // 2 + 95), 3)
         surf.blit(text(self.name, size=100, aliased=False), (50, 50))
 
+    def draw(self, surf: pygame.Surface):
+        self.layer.draw(surf)
+
+    def get_state(self):
+        # everything draw shows, a static menu is only presented again once it changes.
+        # None changes every frame
+        return ()
+
+    def get_dirty_rects(self):
+        # rects the last draw changed, None when it could be anywhere
+        state = self.get_state()
+        if state is not None and state == self.drawn_state:
+            return []
+        self.drawn_state = state
+        return None
+
 
 class Home(Menu):
     def __init__(self, manager: 'MenuManager', name='menu'):
@@ -77,6 +106,9 @@ class Home(Menu):
             y = 200 + i * 75
             surf.blit(text(self.options[i], 50, 'orange' if i == self.selected else 'white'), (100, y))
 
+    def get_state(self):
+        return self.selected
+
 
 class LevelSelect(Menu):
     def __init__(self, manager: 'MenuManager', name='menu'):
@@ -113,14 +145,20 @@ class LevelSelect(Menu):
                     except IndexError:
                         pass
 
-    def draw(self, surf: pygame.Surface):
+    def draw_background(self, surf: pygame.Surface):
         surf.fill(self.background)
         pygame.draw.rect(surf, 'white', surf.get_rect().inflate(-20, -200).move(0, 100 - 10), 3)
         surf.blit(text("Select Level", size=100, aliased=False), (50, 50))
+
+    def draw(self, surf: pygame.Surface):
+        super().draw(surf)
         for i in range(len(self.options)):
             y = 200 + i * 75
             surf.blit(text(self.options[i], 50, 'orange' if i == self.selected else 'white'), (100, y))
 
+    def get_state(self):
+        return self.selected
+
 
 class Credits(Menu):
     def __init__(self, manager: 'MenuManager', name='menu'):
@@ -188,6 +226,9 @@ class Credits(Menu):
             y = 200 + i * 60
             surf.blit(text(self.options[i], 50, 'orange' if i == self.selected else 'white'), (100, y))
 
+    def get_state(self):
+        return self.selected
+
 
 class Quit(Menu):
     def __init__(self, manager, name):
@@ -195,7 +236,7 @@ class Quit(Menu):
         if Globals.get(FIRST_TIME_PLAYED):
             sys.exit(0)
         else:
-            _text = random.choice(
+            _text = rng.menus.choice(
                 [
                     'Play The Game First Idiot!',
                     'First Play The Game You Noob!',
@@ -225,7 +266,7 @@ class Quit(Menu):
 
 
 class Help(Menu):
-    def draw(self, surf: pygame.Surface):
+    def draw_background(self, surf: pygame.Surface):
         _text = [
             'WASD or arrows to move',
             'hold shift to move faster',
@@ -233,7 +274,7 @@ class Help(Menu):
             'f to toggle fullscreen',
             'escape to go back'
         ]
-        super().draw(surf)
+        super().draw_background(surf)
         t = text('We dont do that here but...', size=35)
         surf.blit(t, t.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 50)))
         y = HEIGHT // 2
@@ -353,6 +394,9 @@ class Retry(Menu):
         t = text(self.options[1], color='orange' if self.selected == 1 else 'white')
         surf.blit(t, t.get_rect(center=(x2, HEIGHT // 2 + 150)))
 
+    def get_state(self):
+        return self.selected
+
 
 class PointEnemyScene(Menu):
     def __init__(self, manager: 'MenuManager', name='menu'):
@@ -370,7 +414,7 @@ class PointEnemyScene(Menu):
                 # print(self.name)
                 # self.reset()
                 Globals.set(RETRY_MESSAGE, 'Press E to play in easy mode')
-                self.manager.transition_manager.set_transition(random.choice(['square', 'circle']))
+                self.manager.transition_manager.set_transition(rng.menus.choice(['square', 'circle']))
                 self.manager.switch_mode('retry', reset=True, transition=True)
                 self.manager.sound_manager.fade(500)
             try:
@@ -400,6 +444,9 @@ class PointEnemyScene(Menu):
             pass
         # surf.blit(text(self.manager.sound_manager.elapsed_time.__str__()), (0, 0))
 
+    def get_dirty_rects(self):
+        return [PROGRESS_RECT.copy()]
+
 
 class LineEnemyScene(Menu):
     def __init__(self, manager: 'MenuManager', name='menu'):
@@ -415,7 +462,7 @@ class LineEnemyScene(Menu):
         try:
             if not self.manager.object_manager.player.alive:
                 Globals.set(RETRY_MESSAGE, 'Press E to play in easy mode')
-                self.manager.transition_manager.set_transition(random.choice(['square', 'circle']))
+                self.manager.transition_manager.set_transition(rng.menus.choice(['square', 'circle']))
                 self.manager.switch_mode('retry', reset=True, transition=True)
                 self.manager.sound_manager.fade(500)
         except AttributeError:
@@ -444,6 +491,9 @@ class LineEnemyScene(Menu):
             pass
         # surf.blit(text(self.manager.sound_manager.elapsed_time.__str__()), (0, 0))
 
+    def get_dirty_rects(self):
+        return [PROGRESS_RECT.copy()]
+
 
 class TriangleEnemyScene(Menu):
     def __init__(self, manager: 'MenuManager', name='menu'):
@@ -457,7 +507,7 @@ class TriangleEnemyScene(Menu):
         try:
             if not self.manager.object_manager.player.alive:
                 Globals.set(RETRY_MESSAGE, 'Press E to play in easy mode')
-                self.manager.transition_manager.set_transition(random.choice(['square', 'circle']))
+                self.manager.transition_manager.set_transition(rng.menus.choice(['square', 'circle']))
                 self.manager.switch_mode('retry', reset=True, transition=True)
                 self.manager.sound_manager.fade(500)
         except AttributeError:
@@ -490,6 +540,9 @@ class TriangleEnemyScene(Menu):
             pass
         # surf.blit(text(self.manager.sound_manager.elapsed_time.__str__()), (0, 0))
 
+    def get_dirty_rects(self):
+        return [PROGRESS_RECT.copy()]
+
 
 class QuadrilateralEnemyScene(Menu):
     def __init__(self, manager: 'MenuManager', name='menu'):
@@ -565,14 +618,14 @@ class Settings(Menu):
         for ev in events:
             if ev.type == pygame.MOUSEMOTION:
                 for i in range(len(self.pins)):
-                    if pygame.Vector2(self.pins[i]).distance_squared_to(pygame.mouse.get_pos()) <= self.PIN_RAD ** 2:
+                    if pygame.Vector2(self.pins[i]).distance_squared_to(replay.get_mouse_pos()) <= self.PIN_RAD ** 2:
                         self.pin_state[i] = 1
                     else:
                         self.pin_state[i] = 0
 
             if ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
                 for i in range(len(self.pins)):
-                    if pygame.Vector2(self.pins[i]).distance_squared_to(pygame.mouse.get_pos()) <= self.PIN_RAD ** 2:
+                    if pygame.Vector2(self.pins[i]).distance_squared_to(replay.get_mouse_pos()) <= self.PIN_RAD ** 2:
                         self.pin_state[i] = 2
                         self.pin_to_del = i
 
@@ -594,6 +647,10 @@ class Settings(Menu):
             if self.pin_state[i] == 2:
                 pygame.draw.circle(surf, self.PIN_CLICK_COLOR, self.pins[i], self.PIN_RAD)
 
+    def get_state(self):
+        # the notice falls and the pins light up under the mouse
+        return None
+
 
 class MenuManager:
     # TODO implement StackBasedGameLoop
@@ -605,6 +662,10 @@ class MenuManager:
         self.subtitle_manager: SubtitleManager = SubtitleManager()
         self.object_manager: ObjectManager = ObjectManager()
         self.sound_manager = SoundManager()
+        self.profiler = FrameProfiler()
+        self.hud = PerformanceHUD(self)
+        self.presented_menu = None
+        self.hud_drawn = []
         self.menus = {
             'home': Home(self, 'home'),
             'intro': Intro(self, 'intro'),
@@ -667,6 +728,8 @@ class MenuManager:
                     # )
                     for i in get_typed_subtitles(f'{subtitle} Mode Entered', pos=(WIDTH // 2, HEIGHT - 50)):
                         self.subtitle_manager.add(i)
+                if e.key == pygame.K_F3:
+                    self.hud.toggle()
                 if e.key == pygame.K_KP_PLUS:
                     self.sound_manager.skip_to(self.sound_manager.elapsed_time + 10)
                 # if e.key == pygame.K_KP_MINUS:
@@ -679,16 +742,40 @@ class MenuManager:
                 self.to_switch = 'none'
                 self.to_reset = False
                 self.transition_manager.open()
+        profiler = self.profiler
+        profiler.start()
         self.menu.update(events)
+        profiler.lap('menu.update')
         self.object_manager.update(events)
+        profiler.lap('objects.update')
         self.transition_manager.update(events)
+        profiler.lap('transition.update')
         self.subtitle_manager.update()
+        profiler.lap('subtitles.update')
+        self.sound_manager.update_time()
 
-    def draw(self, surf: pygame.Surface):
+    def draw(self, surf: pygame.Surface, alpha=1.0):
+        profiler = self.profiler
+        profiler.start()
         self.menu.draw(surf)
-        self.object_manager.draw(surf)
+        profiler.lap('menu.draw')
+        self.object_manager.draw(surf, alpha)
+        profiler.lap('objects.draw')
         self.transition_manager.draw(surf)
+        profiler.lap('transition.draw')
         self.subtitle_manager.draw(surf)
-        self.sound_manager.update_time()
+        profiler.lap('subtitles.draw')
+        self.hud_drawn = self.hud.draw(surf)
         # surf.blit(text(Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK).__str__(), color='white'), (0, 150))
         # surf.blit(text(self.transition_manager.transition.status, color='black'), (0, 0))
+
+    def get_dirty_rects(self):
+        """rects the last draw changed, None when that could be anywhere"""
+        rects = self.menu.get_dirty_rects()
+        if self.menu is not self.presented_menu:
+            self.presented_menu = self.menu
+            return None
+        for changed in (self.object_manager.drawn, self.transition_manager.get_dirty_rects(),
+                        self.subtitle_manager.get_dirty_rects(), self.hud_drawn):
+            rects = dirty.note(rects, changed)
+        return rects
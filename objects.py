@@ -1,36 +1,122 @@
-import random
-from math import sin, cos, radians, degrees, atan2
+from math import degrees, atan2, hypot
 from operator import attrgetter
+from time import perf_counter
 from typing import Union
 
 import pygame.event
 
-from config import WIDTH, HEIGHT, Globals
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import charts
+import clock
+import dirty
+import replay
+import rng
+import splat
+import sprites
+import tracing
+from charts import ChartCursor, load_chart
+from collision import SpatialHash, bounds_overlap, clip_segments, triangle_collides_rect
+from config import FPS, WIDTH, HEIGHT, Globals
 from constants import *
+from trig import burst, direction
 from utils import *
 
 
 class BaseObject:
+    # objects with collidable set are checked against the player every frame
+    collidable = False
+    # segment objects expose points and are clipped against the player in one batch
+    segment_collision = False
+    # culling policy applied by the ObjectManager after every update, objects that opt in
+    # expose x and y and are dropped once that point is further than cull_margin outside
+    # the arena or once they have been alive for max_lifetime seconds
+    cull_margin = None
+    max_lifetime = None
+    # poolable objects are recycled through ObjectManager.acquire once they die
+    poolable = False
+
     def __init__(self):
         self.alive = True
         self.z = 0
+        self.spawn_time = 0.0
         self.object_manager: Union[ObjectManager, None] = None
 
     def update(self, events: list[pygame.event.Event]):
         pass
 
     def draw(self, surf: pygame.Surface):
-        pass
+        # returns the rect it changed or a list of them, None when it can't tell
+        return []
+
+    def get_blits(self, alpha=1.0):
+        # (surface, position) pairs drawing the object alpha of the way from its previous step
+        # to its current one, ObjectManager.draw batches them into one blits call per layer.
+        # None draws the object through draw instead
+        return None
+
+    def draw_between(self, surf: pygame.Surface, alpha):
+        # draws the object alpha of the way from its previous step to its current one,
+        # objects without blits are drawn where they are
+        blits = self.get_blits(alpha)
+        if blits is None:
+            return self.draw(surf)
+        sprites.blits(surf, blits)
 
     def check_collision(self, player: 'Player'):
         pass
 
+    def advance(self, frames):
+        # moves a freshly spawned object as if it had been updated for frames frames,
+        # used to catch up on chart events that came due earlier in the frame
+        pass
+
+    def get_bounds(self):
+        # (left, top, right, bottom) enclosing everything check_collision can hit
+        # None keeps the object out of the broad phase, so it is always tested
+        return None
+
+    def reset(self, *args, **kwargs):
+        # acquire hook, brings a pooled object back to life with new constructor arguments
+        self.__init__(*args, **kwargs)
+
+    def release(self):
+        # release hook, called when a dead object goes back to its pool
+        self.object_manager = None
+
 
 class Enemy(BaseObject):
+    # soundtrack whose chart this enemy plays
+    track = None
+
+    def __init__(self):
+        super().__init__()
+        self.chart = load_chart(self.track)
+        self.cursor = ChartCursor(self.chart)
+
     def use_ai(self, player: 'Player'):
         if not player:
             return
 
+    def get_due_events(self):
+        # every event that came due since the last frame and how many frames late it fires,
+        # bullets are moved ahead by that much so patterns keep their shape at any frame rate
+        elapsed = Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK)
+        times = self.chart.times
+        due = [(i, (elapsed - times[i]) * FPS) for i in self.cursor.advance(elapsed)]
+        if tracing.tracer is not None:
+            for i, _ in due:
+                tracing.tracer.instant(f'chart.{charts.KIND_NAMES[self.chart.kind(i)]}', i)
+        return due
+
+    def launch(self, event):
+        chart = self.chart
+        _type = LAUNCHER_TYPES[chart.kind(event)]
+        return [self.object_manager.acquire(_type, self.origin, (chart.a[i], chart.b[i])) for i in chart.rows(event)]
+
 
 class Player(BaseObject):
     def __init__(self, x=WIDTH // 2, y=HEIGHT // 2 + 150):
@@ -40,6 +126,8 @@ class Player(BaseObject):
         self.size = 15
         self.z = 1
         self.rect_list = []
+        # position before the last update, for drawing between steps
+        self.prev = x, y
         self.surf = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
         self.surf.fill('blue')
 
@@ -52,9 +140,10 @@ class Player(BaseObject):
         return pygame.Rect(self.x - self.size // 2, self.y - self.size // 2, self.size, self.size)
 
     def update(self, events: list[pygame.event.Event]):
+        self.prev = self.x, self.y
         speed = 7
         v = pygame.Vector2(0, 0)
-        keys = pygame.key.get_pressed()
+        keys = replay.get_pressed()
         if keys[pygame.K_RSHIFT] or keys[pygame.K_LSHIFT]:
             speed *= 3
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
@@ -85,6 +174,7 @@ class Player(BaseObject):
 
     def draw(self, surf: pygame.Surface):
         rect = self.rect
+        rects = []
         self.rect_list = [i for i in self.rect_list if i[2] > 1]
         for i in self.rect_list:
             i[2] -= 35
@@ -93,11 +183,24 @@ class Player(BaseObject):
             self.surf.set_alpha(i[2])
             # pygame.draw.rect(surf, '#00AAFF', (i[0], i[1], 10, 10))
             # pygame.draw.rect(surf, color, (i[0] - self.size // 2, i[1] - self.size // 2, self.size, self.size))
-            surf.blit(self.surf, self.surf.get_rect(center=i[0:2]))
-        pygame.draw.rect(surf, 'blue', rect)
+            rects.append(surf.blit(self.surf, self.surf.get_rect(center=i[0:2])))
+        rects.append(pygame.draw.rect(surf, 'blue', rect))
+        return rects
+
+    def draw_between(self, surf: pygame.Surface, alpha):
+        x, y = self.x, self.y
+        px, py = self.prev
+        self.x, self.y = px + (x - px) * alpha, py + (y - py) * alpha
+        rects = self.draw(surf)
+        self.x, self.y = x, y
+        return rects
 
 
 class PointBullet(BaseObject):
+    collidable = True
+    poolable = True
+    cull_margin = 0
+
     def __init__(self, x=WIDTH // 2, y=HEIGHT // 2, dx=1.0, dy=1.0, r=5, color='red'):
         super().__init__()
         self.x = x
@@ -112,54 +215,213 @@ class PointBullet(BaseObject):
     def rect(self):
         return pygame.Rect(self.x - self.r // 2, self.y - self.r // 2, self.r * 2, self.r * 2).inflate(-2, -2)
 
+    def get_bounds(self):
+        return self.x - self.r, self.y - self.r, self.x + self.r * 2, self.y + self.r * 2
+
     def check_collision(self, player: 'Player'):
         return player.rect.inflate(-5, -5).colliderect(self.rect)
 
+    def advance(self, frames):
+        self.x += self.dx * self.speed * frames
+        self.y += self.dy * self.speed * frames
+
     def update(self, events: list[pygame.event.Event]):
         self.x += self.dx * self.speed
         self.y += self.dy * self.speed
 
-        if not ((0 <= self.x <= WIDTH) and (0 <= self.y <= HEIGHT)):
-            self.alive = False
+    def get_blits(self, alpha=1.0):
+        back = (1 - alpha) * self.speed
+        image, (ox, oy) = sprites.sprite('circle', self.r, 0, ('white', self.color), 2 if self.r > 3 else 1)
+        return (image, (self.x - self.dx * back + ox, self.y - self.dy * back + oy)),
 
     def draw(self, surf: pygame.Surface):
-        pygame.draw.circle(surf, 'white', (self.x, self.y), self.r)
-        pygame.draw.circle(surf, self.color, (self.x, self.y), self.r, 2 if self.r > 3 else 1)
+        sprites.blits(surf, self.get_blits())
+
+
+class PointBulletPool(BaseObject):
+    """
+    Struct-of-arrays store for PointBullets
+    every bullet is a row in the numpy arrays, so moving, culling
+    and collision checking happen in one vectorized step per frame
+    """
+    COLORS = ('red', 'white', 'blue')
+    collidable = True
+    # the pool culls its own rows with PointBullet's policy
+    bullet_type = PointBullet
+
+    def __init__(self, capacity=256, speed=2):
+        super().__init__()
+        self.speed = speed
+        self.count = 0
+        self.capacity = 0
+        self.x = self.y = self.dx = self.dy = numpy.empty(0)
+        self.r = numpy.empty(0, numpy.int32)
+        self.color_id = numpy.empty(0, numpy.uint8)
+        self.alive_mask = numpy.empty(0, bool)
+        self._pending = []
+        self.reserve(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, capacity):
+        if capacity <= self.capacity:
+            return
+        n = self.count
+        for name in ('x', 'y', 'dx', 'dy', 'r', 'color_id', 'alive_mask'):
+            old = getattr(self, name)
+            new = numpy.zeros(capacity, old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def clear(self):
+        self.count = 0
+        self._pending.clear()
+
+    def emit(self, x, y, velocities, r=5, color='red', frames=0):
+        # bullets are staged and only join the arrays on the next commit,
+        # same as objects going through ObjectManager.add
+        color_id = self.COLORS.index(color)
+        step = self.speed * frames
+        for dx, dy in velocities:
+            self._pending.append((x + dx * step, y + dy * step, dx, dy, r, color_id))
+
+    def commit(self):
+        if not self._pending:
+            return
+        n = self.count
+        k = len(self._pending)
+        if n + k > self.capacity:
+            self.reserve(max(self.capacity * 2, n + k))
+        x, y, dx, dy, r, color_id = zip(*self._pending)
+        self.x[n:n + k] = x
+        self.y[n:n + k] = y
+        self.dx[n:n + k] = dx
+        self.dy[n:n + k] = dy
+        self.r[n:n + k] = r
+        self.color_id[n:n + k] = color_id
+        self.alive_mask[n:n + k] = True
+        self.count = n + k
+        self._pending.clear()
+
+    def check_collision(self, player: 'Player'):
+        n = self.count
+        if n == 0:
+            return False
+        rect = player.rect.inflate(-5, -5)
+        # PointBullet.rect, with pygame's truncation of float coordinates
+        r = self.r[:n]
+        left = numpy.trunc(self.x[:n] - r // 2) + 1
+        top = numpy.trunc(self.y[:n] - r // 2) + 1
+        size = r * 2 - 2
+        hit = (left < rect.right) & (left + size > rect.left) & (top < rect.bottom) & (top + size > rect.top)
+        return bool(hit.any())
+
+    def update(self, events: list[pygame.event.Event]):
+        n = self.count
+        if n == 0:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        x += self.dx[:n] * self.speed
+        y += self.dy[:n] * self.speed
+        alive = self.alive_mask[:n]
+        margin = self.bullet_type.cull_margin
+        numpy.logical_and((-margin <= x) & (x <= WIDTH + margin), (-margin <= y) & (y <= HEIGHT + margin), out=alive)
+        if alive.all():
+            return
+        keep = numpy.flatnonzero(alive)
+        k = len(keep)
+        if self.object_manager:
+            self.object_manager.count_culled(self.bullet_type, n - k)
+        for arr in (self.x, self.y, self.dx, self.dy, self.r, self.color_id):
+            arr[:k] = arr[keep]
+        self.alive_mask[:k] = True
+        self.count = k
+
+    def positions(self, alpha=1.0):
+        n = self.count
+        xs = self.x[:n]
+        ys = self.y[:n]
+        if alpha < 1:
+            back = (1 - alpha) * self.speed
+            xs = xs - self.dx[:n] * back
+            ys = ys - self.dy[:n] * back
+        return xs, ys
+
+    def get_blits(self, alpha=1.0):
+        # from splat.MIN_BULLETS on the pool splats itself in draw_between instead
+        if self.count >= splat.MIN_BULLETS:
+            return None
+        return self.blit_rows(*self.positions(alpha))
+
+    def blit_rows(self, xs, ys):
+        n = self.count
+        # a handful of radius and color combinations cover every row, look each up once
+        looks = {}
+        blits = []
+        append = blits.append
+        for x, y, r, c in zip(xs.tolist(), ys.tolist(), self.r[:n].tolist(), self.color_id[:n].tolist()):
+            look = looks.get((r, c))
+            if look is None:
+                image, (ox, oy) = sprites.sprite('circle', r, 0, ('white', self.COLORS[c]), 2 if r > 3 else 1)
+                look = looks[r, c] = image, ox, oy
+            append((look[0], (x + look[1], y + look[2])))
+        return blits
+
+    def draw(self, surf: pygame.Surface):
+        self.draw_between(surf, 1.0)
+
+    def draw_between(self, surf: pygame.Surface, alpha):
+        xs, ys = self.positions(alpha)
+        n = self.count
+        if n >= splat.MIN_BULLETS and splat.supported(surf):
+            splat.splat(surf, xs, ys, self.r[:n], self.color_id[:n], self.COLORS)
+        else:
+            sprites.blits(surf, self.blit_rows(xs, ys))
 
 
 class PointSpreadBullet(BaseObject):
+    poolable = True
+
     def __init__(self, pos=(WIDTH // 2, HEIGHT // 2), target_pos=(WIDTH // 2, HEIGHT // 2)):
         super().__init__()
         self.pos = pygame.Vector2(pos)
         self.target_pos = pygame.Vector2(target_pos)
         self.r = 0
 
+    def reset(self, pos=(WIDTH // 2, HEIGHT // 2), target_pos=(WIDTH // 2, HEIGHT // 2)):
+        BaseObject.__init__(self)
+        self.pos.update(pos)
+        self.target_pos.update(target_pos)
+        self.r = 0
+
     def update(self, events: list[pygame.event.Event]):
         self.r += 0.15
         self.r = clamp(self.r, 0, 10)
         _dx = (self.target_pos - self.pos)
         # self.pos += dx / 20
         if _dx.length() < 3:
-            self.pos = self.target_pos
+            self.pos.update(self.target_pos)
         else:
             self.pos += _dx / 20
         if self.pos == self.target_pos:
-            _bullets = []
-            speed = 3
-            offset = random.randint(-15, 15)
-            for i in range(offset, 360 + offset, 30):
-                dx = cos(radians(i)) * speed
-                dy = sin(radians(i)) * speed
-                _bullets.append(PointBullet(self.pos.x, self.pos.y, dx, dy, r=3))
-            self.object_manager.add_multiple(_bullets)
+            offset = rng.gameplay.randint(-15, 15)
+            self.object_manager.add_point_bullets(self.pos.x, self.pos.y, burst(30, offset, 3), r=3)
             self.alive = False
 
     def draw(self, surf: pygame.Surface):
-        color = random.choice(['white', 'red'])
-        pygame.draw.circle(surf, color, self.pos, self.r)
+        color = rng.cosmetic.choice(['white', 'red'])
+        return pygame.draw.circle(surf, color, self.pos, self.r)
 
 
 class LineBullet(BaseObject):
+    collidable = True
+    poolable = True
+    segment_collision = True
+    max_lifetime = 1
+
     def __init__(self, x=WIDTH // 2, y=HEIGHT // 2, dx=1.0, dy=1.0):
         super().__init__()
         self.x = x
@@ -168,7 +430,6 @@ class LineBullet(BaseObject):
         self.dx = dx
         self.dy = dy
         self.length = WIDTH
-        self.timer = Timer(1)
 
     def check_collision(self, player: 'Player'):
         return player.rect.clipline(*self.points)
@@ -177,18 +438,26 @@ class LineBullet(BaseObject):
     def points(self):
         return (self.x, self.y), (self.x + self.length * self.dx, self.y + self.length * self.dy)
 
+    def get_bounds(self):
+        (x1, y1), (x2, y2) = self.points
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
     def update(self, events: list[pygame.event.Event]):
         # if self.move:
         #     self.x += self.dx * self.speed
         #     self.y += self.dy * self.speed
-        if self.timer.tick:
-            self.alive = False
+        pass
 
     def draw(self, surf: pygame.Surface):
-        pygame.draw.line(surf, 'white', *self.points)
+        return pygame.draw.line(surf, 'white', *self.points)
 
 
 class LineBullet1(BaseObject):
+    collidable = True
+    poolable = True
+    segment_collision = True
+    cull_margin = 25
+
     def __init__(self, x=WIDTH // 2, y=HEIGHT // 2, dx=1.0, dy=1.0, length=10, speed=1):
         super().__init__()
         self.x = x
@@ -197,27 +466,39 @@ class LineBullet1(BaseObject):
         self.dx = dx
         self.dy = dy
         self.length = length
+        # direction and drawn length of points, for the sprite
+        self.angle = degrees(atan2(dy, dx))
+        self.extent = round(length * hypot(dx, dy))
         # self.timer = Timer(10)
 
     @property
     def points(self):
         return (self.x, self.y), (self.x + self.length * self.dx, self.y + self.length * self.dy)
 
+    def get_bounds(self):
+        (x1, y1), (x2, y2) = self.points
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
     def check_collision(self, player: 'Player'):
         return player.rect.clipline(*self.points)
 
+    def advance(self, frames):
+        self.x += self.dx * self.speed * frames
+        self.y += self.dy * self.speed * frames
+
     def update(self, events: list[pygame.event.Event]):
         self.x += self.dx * self.speed
         self.y += self.dy * self.speed
         # if self.timer.tick:
         #     self.alive = Falsed
-        if not pygame.Rect(0, 0, WIDTH, HEIGHT).inflate(50, 50).collidepoint(self.x, self.y):
-            self.alive = False
+
+    def get_blits(self, alpha=1.0):
+        back = (1 - alpha) * self.speed
+        image, (ox, oy) = sprites.sprite('line', self.extent, sprites.snap(self.angle), ('blue', 'white'), 5)
+        return (image, (self.x - self.dx * back + ox, self.y - self.dy * back + oy)),
 
     def draw(self, surf: pygame.Surface):
-        points = self.points
-        pygame.draw.line(surf, 'blue', points[0], points[1], 5)
-        pygame.draw.line(surf, 'white', points[0], points[1], 2)
+        sprites.blits(surf, self.get_blits())
 
 
 class LineBullet2(BaseObject):
@@ -238,41 +519,46 @@ class LineBullet2(BaseObject):
         self.pos2 += self._dir * self.VEL
 
     def draw(self, surf: pygame.Surface):
-        pygame.draw.line(surf, self.COLOUR, self.pos1, self.pos2, width=4)
-        pygame.draw.circle(surf, self.BORDER_COLOUR, self.pos2, 10)
+        line = pygame.draw.line(surf, self.COLOUR, self.pos1, self.pos2, width=4)
+        border = pygame.draw.circle(surf, self.BORDER_COLOUR, self.pos2, 10)
         pygame.draw.circle(surf, self.COLOUR, self.pos2, 8)
+        return [line, border]
 
 
 class LineSpreadBullet(BaseObject):
+    poolable = True
+
     def __init__(self, pos=(WIDTH // 2, HEIGHT // 2), target_pos=(WIDTH // 2, HEIGHT // 2)):
         super().__init__()
         self.pos = pygame.Vector2(pos)
         self.target_pos = pygame.Vector2(target_pos)
 
+    def reset(self, pos=(WIDTH // 2, HEIGHT // 2), target_pos=(WIDTH // 2, HEIGHT // 2)):
+        BaseObject.__init__(self)
+        self.pos.update(pos)
+        self.target_pos.update(target_pos)
+
     def update(self, events: list[pygame.event.Event]):
         _dx = (self.target_pos - self.pos)
         # self.pos += dx / 20
         if _dx.length() < 3:
-            self.pos = self.target_pos
+            self.pos.update(self.target_pos)
         else:
             self.pos += _dx / 20
         if self.pos == self.target_pos:
             _bullets = []
-            speed = 3
-            offset = random.randint(-15, 15)
-            for i in range(offset, 360 + offset, 30):
-                dx = cos(radians(i)) * speed
-                dy = sin(radians(i)) * speed
-                _bullets.append(LineBullet1(self.pos.x, self.pos.y, dx, dy, speed=3))
+            offset = rng.gameplay.randint(-15, 15)
+            for dx, dy in burst(30, offset, 3):
+                _bullets.append(self.object_manager.acquire(LineBullet1, self.pos.x, self.pos.y, dx, dy, speed=3))
             self.object_manager.add_multiple(_bullets)
             self.alive = False
 
     def draw(self, surf: pygame.Surface):
-        color = random.choice(['white', 'blue'])
+        color = rng.cosmetic.choice(['white', 'blue'])
         try:
-            pygame.draw.line(surf, color, self.pos, self.pos + (self.target_pos - self.pos).normalize() * 10, 2)
+            return pygame.draw.line(surf, color, self.pos, self.pos + (self.target_pos - self.pos).normalize() * 10, 2)
         except ValueError:
-            pygame.draw.circle(surf, color, self.pos, 1)
+            return pygame.draw.circle(surf, color, self.pos, 1)
 
 
 class LineRay(BaseObject):
@@ -286,10 +572,12 @@ class LineRay(BaseObject):
         self.ray_timer = Timer(0.01)
         self.offset = 30
         self.t = Timer(2)
-        self.k = random.choice([-1, 1])
+        self.k = rng.gameplay.choice([-1, 1])
         self.angle_offset = self.angle + self.offset * self.k
         self.original_angle_offset = self.angle_offset
         self.done = False
+        # the two edges of the ray never turn
+        self.edges = (direction(self.angle - self.offset), direction(self.angle + self.offset))
 
     def update(self, events: list[pygame.event.Event]):
         # self.x += self.dx * self.speed
@@ -312,32 +600,33 @@ class LineRay(BaseObject):
         if not self.done and self.length >= WIDTH:
             self.angle_offset -= self.k * 2
             if self.ray_timer.tick:
-                dx = cos(radians(self.angle_offset))
-                dy = sin(radians(self.angle_offset))
+                dx, dy = direction(self.angle_offset)
                 self.object_manager.add(
-                    LineBullet(self.x, self.y, dx, dy)
+                    self.object_manager.acquire(LineBullet, self.x, self.y, dx, dy)
                 )
 
         # if not ((0 <= self.x <= WIDTH) and (0 <= self.y <= HEIGHT)):
         #     self.alive = False
 
     def draw(self, surf: pygame.Surface):
-        for i in (self.angle - self.offset, self.angle + self.offset):
-            dx = cos(radians(i))
-            dy = sin(radians(i))
+        rects = []
+        for dx, dy in self.edges:
             if not self.done:
-                pygame.draw.line(surf, 'red',
-                                 (self.x, self.y),
-                                 (self.x + dx * self.length, self.y + dy * self.length), 5)
+                rects.append(pygame.draw.line(surf, 'red',
+                                              (self.x, self.y),
+                                              (self.x + dx * self.length, self.y + dy * self.length), 5))
                 # pygame.draw.line(surf, 'white',
                 #                  (self.x, self.y),
                 #                  (self.x + dx * self.length, self.y + dy * self.length), 1)
             else:
-                pygame.draw.line(surf, 'red', (self.x + dx * (WIDTH - self.length), self.y + dy * (WIDTH - self.length)),
-                                 (self.x + dx * WIDTH, self.y + dy * WIDTH), 3)
+                rects.append(pygame.draw.line(surf, 'red', (self.x + dx * (WIDTH - self.length), self.y + dy * (WIDTH - self.length)),
+                                              (self.x + dx * WIDTH, self.y + dy * WIDTH), 3))
+        return rects
 
 
 class PointEnemy(Enemy):
+    track = 'points'
+
     def __init__(self, x=WIDTH // 2, y=HEIGHT // 2):
         super().__init__()
         self.x = x
@@ -349,221 +638,8 @@ class PointEnemy(Enemy):
         self.z = 1
         self.offset = 0
 
-        def get_all_range(step=0, offset=0):
-            return range(offset, 360 + offset, step)
-
-        def get_one_by_one_range_list(initial_time=0.0, dt=0.1, step=1, offset=0, vel=1.0):
-            _list = [[initial_time + dt * i, [i], vel] for i in get_all_range(step=step, offset=offset)]
-            return _list
-
-        def get_one_by_one_together_list(initial_time=0.0, dt=0.1, step=1, offset=1, vel=1.0, beats=1):
-            _list = []
-            for i in range(beats):
-                a = [initial_time + dt * i, get_all_range(step, offset * i), vel]
-                _list.append(a)
-            return _list
-
-        def get_range_list(initial_time=0.0, dt=0.1, step=0, offset=0, vel=1.0, beats=1):
-            _list = [[initial_time + dt * j, [i for i in get_all_range(step=step, offset=offset * j)], vel] for j in range(beats)]
-            return _list
-
-        self.launching_patterns = [
-            # [0.1, [225, 135, 45, -45]],
-            [0.1, get_all_range(90, 45)],
-            [2, get_all_range(90, 0)],
-            [3.7, get_all_range(90, 45)],
-            [5.3, get_all_range(90, 0)],
-            [7.5, get_all_range(90, 45)],
-            [9, get_all_range(90, 0)],
-            [11, get_all_range(90, 45)],
-            [13, get_all_range(90, 0)],
-
-            *get_one_by_one_range_list(14, dt=0.001, step=8, vel=3),
-            *get_range_list(15, dt=0.9, step=30, offset=5, vel=1, beats=8),
-            *get_range_list(22, dt=1, step=15, offset=5, vel=1, beats=7),
-            *get_range_list(29.5, dt=0.4, step=30, offset=0, vel=3, beats=1),
-            *get_one_by_one_range_list(30.5, dt=0.002, step=20, vel=2),
-            *get_range_list(32, dt=0.4, step=30, offset=0, vel=3, beats=1),
-            *get_one_by_one_range_list(32.5, dt=0.002, step=20, vel=2),
-            *get_range_list(33.5, dt=0.4, step=30, offset=0, vel=3, beats=1),
-            *get_one_by_one_range_list(34.5, dt=0.002, step=20, vel=2),
-            *get_range_list(35, dt=0.4, step=30, offset=10, vel=3, beats=6),
-
-            *get_range_list(35.5, dt=1, step=45, offset=25, vel=3, beats=9),
-
-            # *get_ony_by_one_together_list(44, dt=0.01, step=10, offset=10, vel=1, directions=5),
-            *get_one_by_one_together_list(44, dt=0.1, step=45, offset=5, vel=3, beats=60),
-
-            *get_one_by_one_together_list(51.5, dt=0.1, step=45, offset=-5, vel=3, beats=60),
-
-            [88, 'move'],
-
-            *get_range_list(88, dt=1, step=90, offset=25, vel=2, beats=8),
-
-            [96, get_all_range(30, 10), 3],
-            *get_one_by_one_range_list(97, dt=0.002, step=360 // 10, offset=5, vel=3),
-
-            [97.75, get_all_range(30, 10), 3],
-            *get_one_by_one_range_list(98.75, dt=0.002, step=360 // 10, offset=5, vel=3.25),
-
-            [99.5, get_all_range(30, 10), 3],
-            *get_one_by_one_range_list(100.5, dt=0.002, step=360 // 10, offset=5, vel=3.5),
-
-            [101.25, get_all_range(30, 10), 3],
-            *get_one_by_one_range_list(102.25, dt=0.002, step=360 // 10, offset=5, vel=4),
-
-            # *get_one_by_one_range_list(112, dt=0.002, step=360 // 10, offset=5, vel=4),
-
-            *get_range_list(118, 0.9, 30, 10, vel=3, beats=9),
-            *get_one_by_one_range_list(126.5, dt=0.002, step=360 // 10, offset=5, vel=4),
-
-            [127.5, get_all_range(30, 10), 3],
-            *get_one_by_one_range_list(128.25, dt=0.002, step=360 // 10, offset=5, vel=4),
-
-            [129.5, get_all_range(30, 10), 3],
-            *get_one_by_one_range_list(130.25, dt=0.002, step=360 // 10, offset=5, vel=4),
-
-            [131.5, get_all_range(30, 10), 3],
-            *get_one_by_one_range_list(132.25, dt=0.002, step=360 // 10, offset=5, vel=4),
-
-            *get_range_list(initial_time=133.5, dt=1.75, step=30, offset=10, vel=5, beats=8),
-
-            *get_range_list(147, 1, 45, 15, 3, 5),
-
-            [1000, 'all'],
-            [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-            # [1000, 'all'],
-        ]
-        self.current_timestamp = 0
-
-        def get_enemies_list(_time=0.0, _dt=0.0, _type='a', beats=1):
-            if _type == 'a':
-                return [[
-                    _time + i * _dt,
-                    PointSpreadBullet,
-                    [self.pos, self.pos, self.pos, self.pos],
-                    [(WIDTH / 4, HEIGHT / 4), (WIDTH * 3 / 4, HEIGHT / 4), (WIDTH * 3 / 4, HEIGHT * 3 / 4), (WIDTH / 4, HEIGHT * 3 / 4)]
-                ] for i in range(beats)]
-            elif _type == 'b':
-                return [[
-                    _time + i * _dt,
-                    PointSpreadBullet,
-                    [self.pos, self.pos, self.pos, self.pos],
-                    [(WIDTH / 2, HEIGHT / 4), (WIDTH * 3 / 4, HEIGHT / 2), (WIDTH / 2, HEIGHT * 3 / 4), (WIDTH / 4, HEIGHT / 2)]
-                ] for i in range(beats)]
-            elif _type == 'c':
-                return [[
-                    _time + i * _dt,
-                    PointSpreadBullet,
-                    [self.pos] * 8,
-                    [(WIDTH / 4, HEIGHT / 4), (WIDTH * 3 / 4, HEIGHT / 4), (WIDTH * 3 / 4, HEIGHT * 3 / 4), (WIDTH / 4, HEIGHT * 3 / 4),
-                     (WIDTH / 2, HEIGHT / 4), (WIDTH * 3 / 4, HEIGHT / 2), (WIDTH / 2, HEIGHT * 3 / 4), (WIDTH / 4, HEIGHT / 2)]
-                ] for i in range(beats)]
-            else:
-                return []
-
-        def get_enemy_list_beats(initial_time=0.0, dt=0.002, _type='bottom', count=2):
-            if _type == 'top':
-                return [
-                    [
-                        initial_time + i * dt,
-                        PointSpreadBullet,
-                        [self.pos],
-                        [(WIDTH * (i + 1) / (count + 1), 50)]
-                    ] for i in range(count)
-                ]
-            elif _type == 'bottom':
-                return [
-                    [
-                        initial_time + i * dt,
-                        PointSpreadBullet,
-                        [self.pos],
-                        [(WIDTH * (i + 1) / (count + 1), HEIGHT - 25)]
-                    ] for i in range(count)
-                ]
-            elif _type == 'left':
-                return [
-                    [
-                        initial_time + i * dt,
-                        PointSpreadBullet,
-                        [self.pos],
-                        [(25, HEIGHT * (i + 1) / (count + 1))]
-                    ] for i in range(count)
-                ]
-            elif _type == 'right':
-                return [
-                    [
-                        initial_time + i * dt,
-                        PointSpreadBullet,
-                        [self.pos],
-                        [(WIDTH - 25, HEIGHT * (i + 1) / (count + 1))]
-                    ] for i in range(count)
-                ]
-            else:
-                return []
-
-        self.enemy_launch_patterns = [
-            # [timestamp, enemy_type, [pos_list], [target_pos_list]]
-            *get_enemies_list(59, _dt=1.8, _type='a', beats=4),
-            *get_enemies_list(59 + 1.8 * 4 + 0.1, _dt=1.8, _type='b', beats=4),
-            *get_enemies_list(74, _dt=1.8, _type='c', beats=8),
-
-            [
-                103,
-                PointSpreadBullet,
-                [self.pos] * 3,
-                [(WIDTH / 4, HEIGHT / 4), (WIDTH / 2, HEIGHT / 4), (WIDTH * 3 / 4, HEIGHT / 4)]
-            ],
-            [
-                105,
-                PointSpreadBullet,
-                [self.pos] * 3,
-                [(WIDTH / 4, HEIGHT * 3 / 4), (WIDTH / 2, HEIGHT * 3 / 4), (WIDTH * 3 / 4, HEIGHT * 3 / 4)]
-            ],
-            [
-                107,
-                PointSpreadBullet,
-                [self.pos] * 3,
-                [(WIDTH / 4, HEIGHT / 4), (WIDTH / 4, HEIGHT / 2), (WIDTH / 4, HEIGHT * 3 / 4)]
-            ],
-            [
-                109,
-                PointSpreadBullet,
-                [self.pos] * 3,
-                [(WIDTH * 3 / 4, HEIGHT / 4), (WIDTH * 3 / 4, HEIGHT / 2), (WIDTH * 3 / 4, HEIGHT * 3 / 4)]
-            ],
-
-            *get_enemy_list_beats(112, dt=0.1, _type='top', count=7),
-
-            *get_enemy_list_beats(113.7, dt=0.1, _type='bottom', count=7),
-
-            *get_enemy_list_beats(115.4, dt=0.1, _type='left', count=7),
-
-            *get_enemy_list_beats(117.1, dt=0.1, _type='right', count=7),
-        ]
-        self.current_enemy_timestamp = 0
+        # launchers always fly out from where the enemy spawned
+        self.origin = self.pos
 
         self.k = 0
         self.k1 = 0
@@ -575,106 +651,43 @@ class PointEnemy(Enemy):
     def use_ai(self, player: 'Player'):
         super().use_ai(player)
         self.r *= 0.95
-        self.x += math.sin(time.time() * self.k) * self.k1
-        self.y += math.cos(time.time() * self.k) * self.k1
+        self.x += math.sin(clock.now() * self.k) * self.k1
+        self.y += math.cos(clock.now() * self.k) * self.k1
         self.r = clamp(self.r, 10, 20)
         # if self.phase_timer.tick:
         #     self.phase += 1
-        _bullets = []
         _enemies = []
-        # try:
-        #     if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > Globals.get(TOTAL_DURATION_OF_SOUNDTRACK):
-        #         print(Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK), Globals.get(TOTAL_DURATION_OF_SOUNDTRACK), 'yooooooooooo')
-        #         self.alive = False
-        # except TypeError:
-        #     pass
-        try:
-            if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > self.launching_patterns[self.current_timestamp][0]:
-                if self.launching_patterns[self.current_timestamp][1] == 'all':
-                    for i in range(0, 360, 30):
-                        dx = cos(radians(i))
-                        dy = sin(radians(i))
-                        try:
-                            v = self.launching_patterns[self.current_timestamp][2]
-                            dx *= v
-                            dy *= v
-                        except IndexError:
-                            pass
-                        _bullets.append(
-                            PointBullet(self.x, self.y, dx, dy)
-                        )
-                else:
-                    if self.launching_patterns[self.current_timestamp][1] == 'move':
-                        self.k = 5
-                        self.k1 = 2
-                    else:
-                        for i in self.launching_patterns[self.current_timestamp][1]:
-                            dx = cos(radians(i))
-                            dy = sin(radians(i))
-                            try:
-                                v = self.launching_patterns[self.current_timestamp][2]
-                                dx *= v
-                                dy *= v
-                            except IndexError:
-                                pass
-                            _bullets.append(
-                                PointBullet(self.x, self.y, dx, dy)
-                            )
-                self.current_timestamp += 1
-                _c = 0
-                # print(Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK))
-                for i in self.launching_patterns:
-                    if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > i[0]:
-                        _c += 1
-                        continue
-                    else:
-                        # _c = self.launching_patterns.index(i)
-                        break
-                # if self.current_timestamp != _c:
-                #     _bullets.clear()
-                self.current_timestamp = _c
-        except IndexError:
-            pass
-
-        if _bullets:
-            self.object_manager.add_multiple(_bullets)
-            self.r = 20
-
-        # print(self.current_enemy_timestamp)
-        try:
-            curr = self.enemy_launch_patterns[self.current_enemy_timestamp]
-            if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > curr[0]:
-                for i in range(len(curr[2])):
-                    pos = curr[2][i]
-                    target_pos = curr[3][i]
-                    _enemies.append(
-                        curr[1](pos, target_pos)
-                    )
-                self.current_enemy_timestamp += 1
-                _c = 0
-                for i in self.enemy_launch_patterns:
-                    if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > i[0]:
-                        _c += 1
-                        continue
-                    else:
-                        # _c = self.enemy_launch_patterns.index(i)
-                        break
-                if self.current_enemy_timestamp != _c:
-                    _enemies.clear()
-                self.current_enemy_timestamp = _c
-        except IndexError:
-            pass
+        chart = self.chart
+        for event, frames in self.get_due_events():
+            kind = chart.kind(event)
+            if kind == charts.MOVE:
+                self.k = 5
+                self.k1 = 2
+            elif kind in charts.LAUNCHERS:
+                _enemies.extend(self.launch(event))
+            else:
+                velocities = []
+                for i in chart.rows(event):
+                    v = chart.speeds[i]
+                    velocities.append((chart.a[i] * v, chart.b[i] * v))
+                self.object_manager.add_point_bullets(self.x, self.y, velocities, frames=frames)
+                self.r = 20
 
         if _enemies:
             self.object_manager.add_multiple(_enemies)
             self.r = 20
 
+    def get_blits(self, alpha=1.0):
+        image, (ox, oy) = sprites.sprite('circle', round(self.r), 0, ('white', 'red'))
+        return (image, (self.x + ox, self.y + oy)),
+
     def draw(self, surf: pygame.Surface):
-        pygame.draw.circle(surf, 'white', (self.x, self.y), self.r)
-        pygame.draw.circle(surf, 'red', (self.x, self.y), self.r, 2)
+        sprites.blits(surf, self.get_blits())
 
 
 class LineEnemy(Enemy):
+    track = 'lines'
+
     def __init__(self, x=WIDTH // 2, y=HEIGHT // 2):
         super().__init__()
         self.x = x
@@ -690,142 +703,8 @@ class LineEnemy(Enemy):
         self.k = 0
         self.k1 = 0
 
-        def get_one_by_one(initial_time=0.0, dt=1.0, offset=1, vel=3, beats=1, _type=LineBullet1, initial_offset=0):
-            # _offset = random.randint(-10, 10)
-            _offset = initial_offset
-            return [
-                [initial_time + i * dt, _type, [_offset + (i * offset) % 360], vel] for i in range(beats)
-            ]
-
-        def get_range_one_by_one(initial_time=0.0, dt=1.0, step=1, offset=1, vel=3, beats=1, _type=LineBullet1):
-            return [
-                [initial_time + i * dt, _type, range(offset * i, 360 + offset * i, step), vel] for i in range(beats)
-            ]
-
-        self.launching_patterns = [
-            # [1, LineBullet1, [10, 20, 30], 3],
-            *get_one_by_one(0, 0.4, offset=20, vel=5, beats=15),
-            *get_one_by_one(6, 0.05, offset=20, vel=5, beats=19),
-            *get_one_by_one(7, 0.4, offset=20, vel=5, beats=15),
-            *get_one_by_one(13, 0.05, offset=20, vel=5, beats=19),
-
-            *get_range_one_by_one(13, 0.425, step=30, offset=10, vel=5, beats=17),
-
-            *get_one_by_one(19.5, 0.05, offset=20, vel=5, beats=19),
-
-            *get_range_one_by_one(17, 0.425, step=30, offset=10, vel=5, beats=24),
-
-            *get_one_by_one(26.5, 0.05, offset=20, vel=5, beats=19),
-
-            *get_range_one_by_one(34, 0.4, step=30, offset=10, vel=5, beats=5),
-
-            *get_one_by_one(36, 0.025, offset=20, vel=5, beats=10, initial_offset=0),
-            *get_one_by_one(37.5, 0.025, offset=20, vel=5, beats=10, initial_offset=180),
-
-            *get_one_by_one(42.5, 0.025, offset=20, vel=5, beats=10, initial_offset=0),
-            *get_one_by_one(44.5, 0.025, offset=20, vel=5, beats=10, initial_offset=180),
-
-            [47.75, None, 'line_ray'],
-            [48, None, 'line_ray'],
-            [49, None, 'line_ray'],
-
-            *get_one_by_one(49.5, 0.025, offset=20, vel=5, beats=10, initial_offset=0),
-
-            [51, None, 'line_ray'],
-
-            *get_one_by_one(51.0, 0.025, offset=20, vel=5, beats=10, initial_offset=180),
-
-            [52.5, None, 'line_ray'],
-
-            *get_range_one_by_one(55, 0.4, step=30, offset=10, vel=5, beats=15),
-
-            [61.5, None, 'line_ray'],
-            [63.5, None, 'line_ray'],
-            [65, None, 'line_ray'],
-            [66.75, None, 'line_ray'],
-
-            *get_range_one_by_one(68.5, 0.4, step=30, offset=10, vel=5, beats=4),
-
-            [75, None, 'move'],
-
-            *get_range_one_by_one(95.9, 0.425, step=45, offset=10, vel=5, beats=15),
-            *get_range_one_by_one(102.3, 0.425, step=15, offset=10, vel=5, beats=1),
-        ]
-
-        # self.launching_patterns.clear()
-
-        def get_enemy_list_beats(initial_time=0.0, dt=0.002, _type='bottom', count=2):
-            if _type == 'top':
-                return [
-                    [
-                        initial_time + i * dt,
-                        LineSpreadBullet,
-                        [self.pos],
-                        [(WIDTH * (i + 1) / (count + 1), 25)]
-                    ] for i in range(count)
-                ]
-            elif _type == 'bottom':
-                return [
-                    [
-                        initial_time + i * dt,
-                        LineSpreadBullet,
-                        [self.pos],
-                        [(WIDTH * (i + 1) / (count + 1), HEIGHT - 25)]
-                    ] for i in range(count)
-                ]
-            elif _type == 'left':
-                return [
-                    [
-                        initial_time + i * dt,
-                        LineSpreadBullet,
-                        [self.pos],
-                        [(25, HEIGHT * (i + 1) / (count + 1))]
-                    ] for i in range(count)
-                ]
-            elif _type == 'right':
-                return [
-                    [
-                        initial_time + i * dt,
-                        LineSpreadBullet,
-                        [self.pos],
-                        [(WIDTH - 25, HEIGHT * (i + 1) / (count + 1))]
-                    ] for i in range(count)
-                ]
-            else:
-                return []
-
-        self.enemy_launch_patterns = [
-            [27.5, LineSpreadBullet, [self.pos], [(150, 150)]],
-            [29, LineSpreadBullet, [self.pos], [(WIDTH - 150, 150)]],
-
-            *get_enemy_list_beats(31, dt=0.1, _type='top', count=5),
-            # *get_enemy_list_beats(33, dt=0.1, _type='bottom', count=5),
-            # *get_enemy_list_beats(35, dt=0.1, _type='left', count=5),
-            *get_enemy_list_beats(38, dt=0.1, _type='bottom', count=5),
-
-            *get_enemy_list_beats(40, dt=0.1, _type='left', count=5),
-            *get_enemy_list_beats(42, dt=0.1, _type='right', count=5),
-
-            *get_enemy_list_beats(43.5, dt=0.1, _type='top', count=2),
-            *get_enemy_list_beats(44.5, dt=0.1, _type='bottom', count=2),
-
-            *get_enemy_list_beats(69.5, dt=0.1, _type='bottom', count=2),
-            *get_enemy_list_beats(71, dt=0.4, _type='top', count=7),
-
-            *get_enemy_list_beats(74, dt=0.4, _type='bottom', count=7),
-
-            *get_enemy_list_beats(77, dt=0.4, _type='left', count=7),
-
-            *get_enemy_list_beats(80, dt=0.4, _type='right', count=7),
-
-            *get_enemy_list_beats(83, dt=0.2, _type='top', count=10),
-            *get_enemy_list_beats(85.5, dt=0.2, _type='bottom', count=10),
-            *get_enemy_list_beats(88, dt=0.2, _type='left', count=10),
-            *get_enemy_list_beats(90.5, dt=0.2, _type='right', count=10),
-        ]
-
-        self.current_enemy_timestamp = 0
-        self.current_timestamp = 0
+        # launchers always fly out from where the enemy spawned
+        self.origin = self.pos
 
     @property
     def pos(self):
@@ -840,93 +719,34 @@ class LineEnemy(Enemy):
     def use_ai(self, player: 'Player'):
         super().use_ai(player)
         self.r *= 0.95
-        self.x += math.sin(time.time() * self.k) * self.k1
-        self.y += math.cos(time.time() * self.k) * self.k1
+        self.x += math.sin(clock.now() * self.k) * self.k1
+        self.y += math.cos(clock.now() * self.k) * self.k1
         self.r = clamp(self.r, 10, 20)
         # if self.phase_timer.tick:
         #     self.phase += 1
         _bullets = []
         _enemies = []
-        try:
-            if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > self.launching_patterns[self.current_timestamp][0]:
-                if self.launching_patterns[self.current_timestamp][2] == 'all':
-                    for i in range(0, 360, 30):
-                        dx = cos(radians(i))
-                        dy = sin(radians(i))
-                        try:
-                            v = self.launching_patterns[self.current_timestamp][2]
-                            dx *= v
-                            dy *= v
-                        except IndexError:
-                            pass
-                        _bullets.append(
-                            self.launching_patterns[self.current_timestamp][1](self.x, self.y, dx, dy)
-                        )
-                else:
-                    if self.launching_patterns[self.current_timestamp][2] == 'move':
-                        self.k = 5
-                        self.k1 = 2
-                    elif self.launching_patterns[self.current_timestamp][2] == 'line_ray':
-                        self.launch_ray(player)
-                    else:
-                        for i in self.launching_patterns[self.current_timestamp][2]:
-                            dx = cos(radians(i))
-                            dy = sin(radians(i))
-                            try:
-                                v = self.launching_patterns[self.current_timestamp][3]
-                                dx *= v
-                                dy *= v
-                            except IndexError:
-                                pass
-                            _bullets.append(
-                                self.launching_patterns[self.current_timestamp][1](self.x, self.y, dx, dy, length=15, speed=1)
-                                # LineBullet2((self.x, self.y), pygame.Vector2(1, 1))
-                            )
-                self.current_timestamp += 1
-                _c = 0
-                # print(Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK))
-                for i in self.launching_patterns:
-                    if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > i[0]:
-                        _c += 1
-                        continue
-                    else:
-                        # _c = self.launching_patterns.index(i)
-                        break
-                # if self.current_timestamp != _c:
-                #     _bullets.clear()
-                self.current_timestamp = _c
-        except IndexError:
-            pass
+        chart = self.chart
+        for event, frames in self.get_due_events():
+            kind = chart.kind(event)
+            if kind == charts.MOVE:
+                self.k = 5
+                self.k1 = 2
+            elif kind == charts.LINE_RAY:
+                self.launch_ray(player)
+            elif kind in charts.LAUNCHERS:
+                _enemies.extend(self.launch(event))
+            else:
+                for i in chart.rows(event):
+                    v = chart.speeds[i]
+                    bullet = self.object_manager.acquire(LineBullet1, self.x, self.y, chart.a[i] * v, chart.b[i] * v, length=15, speed=1)
+                    bullet.advance(frames)
+                    _bullets.append(bullet)
 
         if _bullets:
             self.object_manager.add_multiple(_bullets)
             self.r = 20
 
-        # print(self.current_enemy_timestamp)
-        try:
-            curr = self.enemy_launch_patterns[self.current_enemy_timestamp]
-            if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > curr[0]:
-                for i in range(len(curr[2])):
-                    pos = curr[2][i]
-                    target_pos = curr[3][i]
-                    _enemies.append(
-                        curr[1](pos, target_pos)
-                    )
-                self.current_enemy_timestamp += 1
-                _c = 0
-                for i in self.enemy_launch_patterns:
-                    if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > i[0]:
-                        _c += 1
-                        continue
-                    else:
-                        # _c = self.enemy_launch_patterns.index(i)
-                        break
-                if self.current_enemy_timestamp != _c:
-                    _enemies.clear()
-                self.current_enemy_timestamp = _c
-        except IndexError:
-            pass
-
         if _enemies:
             self.object_manager.add_multiple(_enemies)
             self.r = 20
@@ -934,9 +754,12 @@ class LineEnemy(Enemy):
     def update(self, events: list[pygame.event.Event]):
         pass
 
+    def get_blits(self, alpha=1.0):
+        image, (ox, oy) = sprites.sprite('circle', round(self.r), 0, ('white', 'blue'))
+        return (image, (self.x + ox, self.y + oy)),
+
     def draw(self, surf: pygame.Surface):
-        pygame.draw.circle(surf, 'white', (self.x, self.y), self.r)
-        pygame.draw.circle(surf, 'blue', (self.x, self.y), self.r, 2)
+        sprites.blits(surf, self.get_blits())
 
 
 class QuadrilateralEnemy(Enemy):
@@ -959,10 +782,15 @@ class PointClicked(BaseObject):
 
     def draw(self, surf: pygame.Surface):
         if self.r >= 0:
-            pygame.draw.circle(surf, 'white', (self.x, self.y), self.r, 10 - self.r // 10 + 1)
+            return pygame.draw.circle(surf, 'white', (self.x, self.y), self.r, 10 - self.r // 10 + 1)
+        return []
 
 
 class TriangleBullet1(BaseObject):
+    collidable = True
+    poolable = True
+    cull_margin = 15
+
     def __init__(self, x=WIDTH // 2, y=HEIGHT // 2, dx=1.0, dy=1.0, speed=1.0, length=15):
         super().__init__()
         self.x = x
@@ -971,28 +799,44 @@ class TriangleBullet1(BaseObject):
         self.length = length
         self.dx = dx * speed
         self.dy = dy * speed
+        # the angle never changes, so the shape is only built once
+        self.offsets = get_triangle_offsets(self.length, self.angle)
 
     def check_collision(self, player: 'Player'):
-        points = get_triangle(self.length, self.pos, self.angle)
-        for i in range(len(points)):
-            if player.rect.clipline(points[i % 3], points[(i + 1) % 3]):
-                return True
-        return False
+        return triangle_collides_rect(self.points, player.rect)
 
     @property
     def pos(self):
         return self.x, self.y
 
+    @property
+    def points(self):
+        x, y = self.x, self.y
+        return [(x + ox, y + oy) for ox, oy in self.offsets]
+
+    def get_bounds(self):
+        return self.x - self.length, self.y - self.length, self.x + self.length, self.y + self.length
+
+    def advance(self, frames):
+        self.x += self.dx * frames
+        self.y += self.dy * frames
+
     def update(self, events: list[pygame.event.Event]):
         self.x += self.dx
         self.y += self.dy
 
+    def get_blits(self, alpha=1.0):
+        back = 1 - alpha
+        image, (ox, oy) = sprites.sprite('triangle', self.length, sprites.snap(self.angle), ((255, 255, 255), (255, 0, 0)))
+        return (image, (self.x - self.dx * back + ox, self.y - self.dy * back + oy)),
+
     def draw(self, surf: pygame.Surface):
-        draw_triangle(surf, self.pos, length=self.length, angle=self.angle)
-        draw_triangle(surf, self.pos, color=(255, 0, 0), length=self.length, angle=self.angle, width=2)
+        sprites.blits(surf, self.get_blits())
 
 
 class TriangleLauncherOneTime(BaseObject):
+    poolable = True
+
     def __init__(self, pos, target_pos, length=15):
         super().__init__()
         self.pos = pygame.Vector2(pos)
@@ -1000,31 +844,42 @@ class TriangleLauncherOneTime(BaseObject):
         self.angle = 0
         self.length = length
 
+    def reset(self, pos, target_pos, length=15):
+        BaseObject.__init__(self)
+        self.pos.update(pos)
+        self.target_pos.update(target_pos)
+        self.angle = 0
+        self.length = length
+
     def update(self, events: list[pygame.event.Event]):
         self.angle += 10
         self.angle %= 360
         _dx = (self.target_pos - self.pos)
         if _dx.length() < 3:
-            self.pos = self.target_pos
+            self.pos.update(self.target_pos)
         else:
             self.pos += _dx / 20
         if self.pos == self.target_pos:
             _bullets = []
-            speed = 3
-            offset = random.randint(-15, 15)
-            for i in range(offset, 360 + offset, 30):
-                dx = cos(radians(i)) * speed
-                dy = sin(radians(i)) * speed
-                _bullets.append(TriangleBullet1(self.pos.x, self.pos.y, dx, dy, length=10, speed=3))
+            offset = rng.gameplay.randint(-15, 15)
+            for dx, dy in burst(30, offset, 3):
+                _bullets.append(self.object_manager.acquire(TriangleBullet1, self.pos.x, self.pos.y, dx, dy, length=10, speed=3))
             self.object_manager.add_multiple(_bullets)
             self.alive = False
 
+    def get_blits(self, alpha=1.0):
+        color = rng.cosmetic.choice(['red', 'white'])
+        image, (ox, oy) = sprites.sprite('triangle', self.length, sprites.snap(self.angle), (color, None))
+        return (image, (self.pos.x + ox, self.pos.y + oy)),
+
     def draw(self, surf: pygame.Surface):
-        draw_triangle(surf, self.pos, color=random.choice(['red', 'white']), length=self.length, angle=self.angle)
+        sprites.blits(surf, self.get_blits())
         # draw_triangle(surf, self.pos, color=(255, 0, 0), length=self.length, angle=self.angle, width=2)
 
 
 class TriangleEnemy(Enemy):
+    track = 'triangles'
+
     def __init__(self):
         super().__init__()
         self.x = WIDTH // 2
@@ -1037,137 +892,8 @@ class TriangleEnemy(Enemy):
         self.max_r = 35
         self.min_r = 20
 
-        def get_triangle_beats(initial_time, dt=1.0, step=30, offset=10, speed=1.0, beats=1):
-            return [
-                [initial_time + i * dt, TriangleBullet1, range(offset * i, 360 + offset * i, step), speed] for i in range(beats)
-            ]
-
-        def get_one_by_one(initial_time, dt=1.0, step=30, speed=1.0, beats=1, offset_range=0):
-            offset = random.randint(-offset_range, offset_range)
-            return [
-                [initial_time + i * dt, TriangleBullet1, [step * i + offset], speed] for i in range(beats)
-            ]
-
-        def get_all_range(step=0, offset=0):
-            return range(offset, 360 + offset, step)
-
-        def get_one_by_one_together_list(initial_time=0.0, dt=0.1, step=1, offset=1, vel=1.0, beats=1):
-            _list = []
-            for i in range(beats):
-                a = [initial_time + dt * i, TriangleBullet1, get_all_range(step, offset * i), vel]
-                _list.append(a)
-            return _list
-
-        self.launching_patterns = [
-            # [1, TriangleBullet1, [1, 2, 3], 3],
-            *get_triangle_beats(0, dt=0.9, step=45, offset=30, speed=3, beats=2),
-            *get_triangle_beats(2, dt=0.9, step=45, offset=30, speed=3, beats=2),
-            *get_triangle_beats(4, dt=0.9, step=45, offset=30, speed=3, beats=2),
-            *get_triangle_beats(6, dt=0.9, step=45, offset=30, speed=3, beats=2),
-            *get_triangle_beats(8, dt=0.9, step=30, offset=30, speed=3, beats=2),
-            *get_triangle_beats(10, dt=0.9, step=30, offset=30, speed=3, beats=2),
-            *get_triangle_beats(12, dt=0.9, step=45, offset=30, speed=3, beats=2),
-            *get_triangle_beats(14, dt=0.9, step=45, offset=30, speed=3, beats=2),
-
-            [16, TriangleBullet1, [-90], 5],
-            [16.75, TriangleBullet1, [30], 6],
-            [16.9, TriangleBullet1, [150], 6],
-
-            *get_one_by_one(17.5, dt=0.05, step=30, speed=3, beats=10),
-
-            [19, TriangleBullet1, 'all', 5],
-
-            *get_one_by_one(20, dt=0.02, step=20, speed=7, beats=42, offset_range=15),
-            *get_one_by_one(22, dt=0.02, step=20, speed=7, beats=42, offset_range=15),
-            *get_one_by_one(24, dt=0.02, step=20, speed=7, beats=42, offset_range=15),
-            *get_one_by_one(26, dt=0.02, step=20, speed=7, beats=42, offset_range=15),
-            *get_one_by_one(28, dt=0.02, step=20, speed=7, beats=42, offset_range=15),
-            *get_one_by_one(30, dt=0.02, step=20, speed=7, beats=42, offset_range=15),
-
-            *get_one_by_one(32, dt=0.02, step=-20, speed=7, beats=42, offset_range=15),
-            *get_one_by_one(34, dt=0.02, step=-20, speed=7, beats=42, offset_range=15),
-            *get_one_by_one(36, dt=0.02, step=-20, speed=7, beats=42, offset_range=15),
-            *get_one_by_one(38, dt=0.02, step=-20, speed=7, beats=42, offset_range=15),
-
-            [48, None, 'rotate'],
-
-            [50, TriangleBullet1, 'all', 5],
-            [52, TriangleBullet1, 'all', 5],
-            [54, TriangleBullet1, 'all', 5],
-            [56, TriangleBullet1, 'all', 5],
-
-            [56.25, None, 'rotate faster'],
-
-            [58, TriangleBullet1, 'all', 7],
-            [60, TriangleBullet1, 'all', 7],
-            [62, TriangleBullet1, 'all', 7],
-            [64, TriangleBullet1, 'all', 7],
-            [66, TriangleBullet1, 'all', 7],
-
-            # *get_one_by_one(67, dt=0.02, step=20, speed=5, beats=20, offset_range=15),
-            *get_one_by_one_together_list(68, dt=0.1, step=120, offset=10, vel=5, beats=70),
-
-            # [75, TriangleBullet1, 'all', 7],
-            [76, TriangleBullet1, 'all', 7],
-            [77, TriangleBullet1, 'all', 7],
-
-        ]
-
-        # self.launching_patterns.clear()
-
-        def get_enemy_launchers_one_by_one(initial_time, dt, _type='top', count=2):
-            offset = 50
-            if _type == 'top':
-                return [
-                    [
-                        initial_time + i * dt,
-                        TriangleLauncherOneTime,
-                        [self.pos],
-                        [(WIDTH * (i + 1) / (count + 1), offset)]
-                    ] for i in range(count)
-                ]
-            elif _type == 'bottom':
-                return [
-                    [
-                        initial_time + i * dt,
-                        TriangleLauncherOneTime,
-                        [self.pos],
-                        [(WIDTH * (i + 1) / (count + 1), HEIGHT - offset)]
-                    ] for i in range(count)
-                ]
-            elif _type == 'left':
-                return [
-                    [
-                        initial_time + i * dt,
-                        TriangleLauncherOneTime,
-                        [self.pos],
-                        [(offset, HEIGHT * (i + 1) / (count + 1))]
-                    ] for i in range(count)
-                ]
-            elif _type == 'right':
-                return [
-                    [
-                        initial_time + i * dt,
-                        TriangleLauncherOneTime,
-                        [self.pos],
-                        [(WIDTH - offset, HEIGHT * (i + 1) / (count + 1))]
-                    ] for i in range(count)
-                ]
-            else:
-                return []
-
-        self.enemy_launch_patterns = [
-            # [1, TriangleLauncherOneTime, [(0, 0)], [(150, 150)]],
-            # [5, TriangleLauncherOneTime, [(0, 0)], [(150, 150)]],
-            *get_enemy_launchers_one_by_one(40, 0.2, 'top', 5),
-            *get_enemy_launchers_one_by_one(42, 0.2, 'bottom', 5),
-            *get_enemy_launchers_one_by_one(44, 0.2, 'left', 5),
-            *get_enemy_launchers_one_by_one(46, 0.2, 'right', 5),
-
-        ]
-
-        self.current_enemy_timestamp = 0
-        self.current_timestamp = 0
+        # launchers always fly out from where the enemy spawned
+        self.origin = self.pos
 
         self.angle_k = 0
 
@@ -1189,91 +915,33 @@ class TriangleEnemy(Enemy):
 
         _bullets = []
         _enemies = []
-        try:
-            if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > self.launching_patterns[self.current_timestamp][0]:
-                if self.launching_patterns[self.current_timestamp][2] == 'all':
-                    for i in [0, 120, 240]:
-                        i = i - 90 + self.angle
-                        dx = cos(radians(i))
-                        dy = sin(radians(i))
-                        try:
-                            v = self.launching_patterns[self.current_timestamp][3]
-                            dx *= v
-                            dy *= v
-                        except IndexError:
-                            pass
-                        _bullets.append(
-                            self.launching_patterns[self.current_timestamp][1](self.x, self.y, dx, dy)
-                        )
-                else:
-                    if self.launching_patterns[self.current_timestamp][2] == 'rotate':
-                        self.angle_k = 1
-                        # self.k = 5
-                        # self.k1 = 2
-                    elif self.launching_patterns[self.current_timestamp][2] == 'rotate faster':
-                        self.angle_k += 2
-                    else:
-                        for i in self.launching_patterns[self.current_timestamp][2]:
-                            # i = self.angle + 120 * (i - 1) - 90
-                            # i += self.angle
-                            dx = cos(radians(i))
-                            dy = sin(radians(i))
-                            try:
-                                v = self.launching_patterns[self.current_timestamp][3]
-                                dx *= v
-                                dy *= v
-                            except IndexError:
-                                pass
-                            _bullets.append(
-                                self.launching_patterns[self.current_timestamp][1](self.x, self.y, dx, dy, length=10)
-                                # LineBullet2((self.x, self.y), pygame.Vector2(1, 1))
-                            )
-                self.current_timestamp += 1
-                _c = 0
-                # print(Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK))
-                for i in self.launching_patterns:
-                    if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > i[0]:
-                        _c += 1
-                        continue
-                    else:
-                        # _c = self.launching_patterns.index(i)
-                        break
-                # if self.current_timestamp != _c:
-                #     _bullets.clear()
-                self.current_timestamp = _c
-        except IndexError:
-            pass
+        chart = self.chart
+        for event, frames in self.get_due_events():
+            kind = chart.kind(event)
+            if kind == charts.SPIN_BURST:
+                # one bullet out of every corner
+                for dx, dy in burst(120, self.angle - 90, chart.speeds[chart.starts[event]]):
+                    bullet = self.object_manager.acquire(TriangleBullet1, self.x, self.y, dx, dy)
+                    bullet.advance(frames)
+                    _bullets.append(bullet)
+            elif kind == charts.ROTATE:
+                self.angle_k = 1
+            elif kind == charts.ROTATE_FASTER:
+                self.angle_k += 2
+            elif kind in charts.LAUNCHERS:
+                _enemies.extend(self.launch(event))
+            else:
+                for i in chart.rows(event):
+                    v = chart.speeds[i]
+                    bullet = self.object_manager.acquire(TriangleBullet1, self.x, self.y, chart.a[i] * v, chart.b[i] * v, length=10)
+                    bullet.advance(frames)
+                    _bullets.append(bullet)
 
         if _bullets:
             self.object_manager.add_multiple(_bullets)
             self.length = 50
             self.r = self.max_r
 
-        # print(self.current_enemy_timestamp)
-        try:
-            curr = self.enemy_launch_patterns[self.current_enemy_timestamp]
-            if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > curr[0]:
-                for i in range(len(curr[2])):
-                    pos = curr[2][i]
-                    target_pos = curr[3][i]
-                    _enemies.append(
-                        curr[1](pos, target_pos)
-                    )
-                self.current_enemy_timestamp += 1
-                _c = 0
-                for i in self.enemy_launch_patterns:
-                    if Globals.get(ELAPSED_TIME_FOR_SOUNDTRACK) > i[0]:
-                        _c += 1
-                        continue
-                    else:
-                        # _c = self.enemy_launch_patterns.index(i)
-                        break
-                if self.current_enemy_timestamp != _c:
-                    _enemies.clear()
-                self.current_enemy_timestamp = _c
-        except IndexError:
-            pass
-
         if _enemies:
             self.object_manager.add_multiple(_enemies)
             self.length = 50
@@ -1282,8 +950,19 @@ class TriangleEnemy(Enemy):
     def draw(self, surf: pygame.Surface):
         # pygame.draw.circle(surf, 'white', self.pos, self.r)
         # pygame.draw.circle(surf, 'red', self.pos, self.r, 2)
-        draw_triangle(surf, self.pos, length=self.length, angle=self.angle)
-        draw_triangle(surf, self.pos, color=(255, 0, 0), length=self.length, angle=self.angle, width=3)
+        sprites.blits(surf, self.get_blits())
+
+    def get_blits(self, alpha=1.0):
+        image, (ox, oy) = sprites.sprite('triangle', round(self.length), sprites.snap(self.angle), ((255, 255, 255), (255, 0, 0)), 3)
+        return (image, (self.x + ox, self.y + oy)),
+
+
+# chart launcher kinds and the objects they spawn
+LAUNCHER_TYPES = {
+    charts.POINT_SPREAD: PointSpreadBullet,
+    charts.LINE_SPREAD: LineSpreadBullet,
+    charts.TRIANGLE_LAUNCHER: TriangleLauncherOneTime,
+}
 
 
 class ObjectManager:
@@ -1293,6 +972,18 @@ class ObjectManager:
         self.player = None
         self.player_pos = [0, 0]
         self.collision_enabled = True
+        self.collision_grid = SpatialHash()
+        # per frame broad phase numbers: collidable objects, objects found in
+        # the cells around the player and narrow phase tests actually run
+        self.collision_stats = {'objects': 0, 'candidates': 0, 'tested': 0}
+        self.cull_counts: dict[str, int] = {}
+        # free lists of dead poolable objects, and hits / misses / live / high water per type
+        self.pools: dict[type, list[BaseObject]] = {}
+        self.pool_stats: dict[type, dict[str, int]] = {}
+        self.time = clock.now()
+        self.point_bullets = PointBulletPool() if numpy is not None else None
+        # rects the last draw changed while dirty rect updates are on, None when it can't tell
+        self.drawn = None
 
     def get_object_count(self, instance):
         c = 0
@@ -1301,13 +992,60 @@ class ObjectManager:
                 c += 1
         return c
 
+    def acquire(self, _type, *args, **kwargs):
+        # reuses a dead object of the given type when there is one, the caller still adds it
+        stats = self.pool_stats.get(_type)
+        if stats is None:
+            stats = self.pool_stats[_type] = {'hits': 0, 'misses': 0, 'live': 0, 'high_water': 0}
+        free = self.pools.get(_type)
+        if free:
+            _object = free.pop()
+            _object.reset(*args, **kwargs)
+            stats['hits'] += 1
+        else:
+            _object = _type(*args, **kwargs)
+            stats['misses'] += 1
+        stats['live'] += 1
+        if stats['live'] > stats['high_water']:
+            stats['high_water'] = stats['live']
+        return _object
+
+    def release(self, _object: BaseObject):
+        _type = type(_object)
+        stats = self.pool_stats.get(_type)
+        if stats is None:
+            # created directly instead of through acquire
+            return
+        _object.release()
+        stats['live'] -= 1
+        self.pools.setdefault(_type, []).append(_object)
+
+    def release_all(self, _objects: list[BaseObject]):
+        for i in _objects:
+            if i.poolable:
+                self.release(i)
+
+    def get_pool_stats(self):
+        return {
+            _type.__name__: {**stats, 'free': len(self.pools.get(_type, ()))}
+            for _type, stats in self.pool_stats.items()
+        }
+
     def clear_only_objects(self):
+        self.release_all(self._to_add)
+        self.release_all(self.objects)
         self._to_add.clear()
         self.objects.clear()
+        if self.point_bullets:
+            self.point_bullets.clear()
 
     def clear(self):
+        self.release_all(self._to_add)
+        self.release_all(self.objects)
         self._to_add.clear()
         self.objects.clear()
+        if self.point_bullets:
+            self.point_bullets.clear()
         if self.player:
             self.player_pos = [self.player.x, self.player.y]
         self.player = None
@@ -1318,38 +1056,178 @@ class ObjectManager:
             self.player = Player(WIDTH // 2, HEIGHT // 2 + 150)
         else:
             self.player = Player(*self.player_pos)
+        if self.point_bullets is not None:
+            self.add(self.point_bullets)
 
     def add(self, _object: BaseObject):
         _object.object_manager = self
+        _object.spawn_time = self.time
         self._to_add.append(_object)
 
     def add_multiple(self, _objects: list[BaseObject]):
         for i in _objects:
             self.add(i)
 
+    def add_point_bullets(self, x, y, velocities: list[tuple[float, float]], r=5, color='red', frames=0):
+        # fired into the bullet pool when numpy is available, as separate PointBullets otherwise
+        if self.point_bullets is not None:
+            self.point_bullets.emit(x, y, velocities, r, color, frames)
+        else:
+            _bullets = [self.acquire(PointBullet, x, y, dx, dy, r=r, color=color) for dx, dy in velocities]
+            for i in _bullets:
+                i.advance(frames)
+            self.add_multiple(_bullets)
+
+    def check_collisions(self):
+        grid = self.collision_grid
+        grid.clear()
+        always = []
+        segments = []
+        batch_segments = numpy is not None
+        count = 0
+        for i in self.objects:
+            if i.collidable:
+                count += 1
+                if batch_segments and i.segment_collision:
+                    segments.append(i)
+                    continue
+                bounds = i.get_bounds()
+                if bounds is None:
+                    always.append(i)
+                else:
+                    grid.insert(i, bounds)
+        rect = self.player.rect.inflate(4, 4)
+        area = rect.left, rect.top, rect.right, rect.bottom
+        candidates = grid.query(area)
+        tested = 0
+        tracer = tracing.tracer
+        runs = None
+        if tracer is not None:
+            # the order of the tests doesn't matter, group them by class for the trace
+            runs = tracer.runs('objects.collide')
+            always.sort(key=lambda i: type(i).__name__)
+            candidates.sort(key=lambda i: type(i).__name__)
+        for i in always:
+            if runs:
+                runs.next(i)
+            tested += 1
+            if i.check_collision(self.player):
+                self.player.alive = False
+        for i in candidates:
+            if runs:
+                runs.next(i)
+            if bounds_overlap(area, i.get_bounds()):
+                tested += 1
+                if i.check_collision(self.player):
+                    self.player.alive = False
+        if runs:
+            runs.close()
+        if segments:
+            t = perf_counter()
+            tested += len(segments)
+            points = numpy.array([i.points for i in segments]).reshape(-1, 4)
+            if clip_segments(self.player.rect, points[:, 0], points[:, 1], points[:, 2], points[:, 3]).any():
+                self.player.alive = False
+            if tracer is not None:
+                tracer.complete('objects.collide.segments', t, perf_counter())
+        stats = self.collision_stats
+        stats['objects'] = count
+        stats['candidates'] = len(always) + len(candidates) + len(segments)
+        stats['tested'] = tested
+
+    def count_culled(self, _type, count=1):
+        self.cull_counts[_type.__name__] = self.cull_counts.get(_type.__name__, 0) + count
+
+    def cull(self, _object: BaseObject):
+        margin = _object.cull_margin
+        if margin is not None:
+            if not (-margin <= _object.x <= WIDTH + margin and -margin <= _object.y <= HEIGHT + margin):
+                _object.alive = False
+        lifetime = _object.max_lifetime
+        if lifetime is not None and self.time - _object.spawn_time > lifetime:
+            _object.alive = False
+        if not _object.alive:
+            self.count_culled(type(_object))
+
+    def flush_blits(self, surf, batch):
+        if not batch:
+            return
+        t = perf_counter()
+        if self.drawn is not None:
+            # blits hands back the rect of every sprite
+            self.drawn.extend(surf.blits(batch))
+        else:
+            sprites.blits(surf, batch)
+        # nests inside the span of whichever object's run the flush happened in
+        tracing.lap('objects.draw.blits', t)
+        batch.clear()
+
     def update(self, events: list[pygame.event.Event]):
+        self.time = clock.now()
         if self._to_add:
             self.objects.extend(self._to_add)
             self._to_add.clear()
-        self.objects = [i for i in self.objects if i.alive]
+        if self.point_bullets is not None:
+            self.point_bullets.commit()
+        objects = self.objects
+        self.objects = [i for i in objects if i.alive]
+        if len(self.objects) != len(objects):
+            self.release_all([i for i in objects if not i.alive])
         self.objects.sort(key=attrgetter('z'))
         # print(self.objects)
         # print(self.get_object_count(Player))
+        if self.collision_enabled and self.player:
+            self.check_collisions()
+        runs = tracing.tracer.runs('objects.update') if tracing.tracer is not None else None
         for i in self.objects:
+            if runs:
+                runs.next(i)
             # i.update(events)
-            # TODO collisions
-            if self.collision_enabled:
-                if i.check_collision(self.player):
-                    self.player.alive = False
             if isinstance(i, Enemy):
                 i.use_ai(self.player)
             else:
                 i.update(events)
+                if i.alive and (i.cull_margin is not None or i.max_lifetime is not None):
+                    self.cull(i)
+        if runs:
+            runs.close()
         if self.player:
             self.player.update(events)
 
-    def draw(self, surf: pygame.Surface):
+    def draw(self, surf: pygame.Surface, alpha=1.0):
+        # alpha below 1 draws between the last two simulation steps.
+        # Blits of consecutive objects on the same z layer go out in one call, objects
+        # without blits flush what has been collected and draw themselves, so the order holds
+        runs = tracing.tracer.runs('objects.draw') if tracing.tracer is not None else None
+        # with dirty rect updates on, what every object changed ends up in drawn
+        track = Globals.get(DIRTY_RECTS)
+        self.drawn = [] if track else None
+        batch = []
+        z = None
         for i in self.objects:
-            i.draw(surf)
+            if runs:
+                runs.next(i)
+            if i.z != z:
+                self.flush_blits(surf, batch)
+                z = i.z
+            blits = i.get_blits(alpha)
+            if blits is not None:
+                batch.extend(blits)
+                continue
+            self.flush_blits(surf, batch)
+            if alpha < 1:
+                changed = i.draw_between(surf, alpha)
+            else:
+                changed = i.draw(surf)
+            if track:
+                self.drawn = dirty.note(self.drawn, changed)
+        self.flush_blits(surf, batch)
+        if runs:
+            runs.close()
         if self.player:
-            self.player.draw(surf)
+            if alpha < 1:
+                changed = self.player.draw_between(surf, alpha)
+            else:
+                changed = self.player.draw(surf)
+            if track:
+                self.drawn = dirty.note(self.drawn, changed)
@@ -0,0 +1,35 @@
+"""
+Frame phase timing
+MenuManager laps the profiler after each of its update and draw phases,
+so tools can read how long every part of the last frame took
+"""
+
+from time import perf_counter
+
+import tracing
+
+PHASES = (
+    'menu.update', 'objects.update', 'transition.update', 'subtitles.update',
+    'menu.draw', 'objects.draw', 'transition.draw', 'subtitles.draw',
+)
+
+
+class FrameProfiler:
+    def __init__(self):
+        # latest duration of every phase in seconds
+        self.last = dict.fromkeys(PHASES, 0.0)
+        self._time = perf_counter()
+
+    def start(self):
+        self._time = perf_counter()
+
+    def lap(self, phase):
+        t = perf_counter()
+        self.last[phase] = t - self._time
+        if tracing.tracer is not None:
+            tracing.tracer.complete(phase, self._time, t)
+        self._time = t
+
+    @property
+    def total(self):
+        return sum(self.last.values())
@@ -0,0 +1,221 @@
+"""
+Input recording and replay
+the game reads input through get_events, get_pressed and get_mouse_pos here
+instead of pygame, so a Recorder can log every simulation step to a small binary file
+and a Replayer can feed the same frames back, clock and random seed included.
+DIMENSION_BEATS_RECORD=<path> and DIMENSION_BEATS_REPLAY=<path> switch the game
+over, headless.py takes --record and --replay
+"""
+
+import atexit
+import struct
+
+import pygame
+
+import clock
+import rng
+from config import FPS
+
+MAGIC = b'DBRP'
+VERSION = 2
+# magic, version, fps, clock time at the start, rng seed, level ('' when recorded from the menus)
+HEADER = struct.Struct('=4sHHdQ16s')
+# clock time, key mask, mouse position, number of events that follow
+FRAME = struct.Struct('=dHhhH')
+# event code, key, mod, position, button
+EVENT = struct.Struct('=BiHhhB')
+
+# keys the player reads, one bit each in the key mask
+KEYS = (
+    pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+    pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s,
+    pygame.K_LSHIFT, pygame.K_RSHIFT,
+)
+BITS = {key: 1 << i for i, key in enumerate(KEYS)}
+
+# events the game handles, everything else is neither recorded nor passed on
+EVENT_TYPES = (
+    pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP,
+    pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+    pygame.TEXTINPUT,
+)
+CODES = {_type: i for i, _type in enumerate(EVENT_TYPES)}
+
+
+class KeyState:
+    """stands in for pygame.key.get_pressed(), only knows the recorded keys"""
+
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    def __getitem__(self, key):
+        return bool(self.mask & BITS.get(key, 0))
+
+
+def key_mask(pressed):
+    return sum(bit for key, bit in BITS.items() if pressed[key])
+
+
+def pack_events(events):
+    # text input is stored one character per event, its code point in place of the key
+    data = []
+    for e in events:
+        if e.type == pygame.TEXTINPUT:
+            data.extend(EVENT.pack(CODES[e.type], ord(c), 0, 0, 0, 0) for c in e.text)
+        else:
+            x, y = getattr(e, 'pos', (0, 0))
+            data.append(EVENT.pack(CODES[e.type], getattr(e, 'key', 0), getattr(e, 'mod', 0), x, y, getattr(e, 'button', 0)))
+    return data
+
+
+def unpack_event(data, offset):
+    code, key, mod, x, y, button = EVENT.unpack_from(data, offset)
+    _type = EVENT_TYPES[code]
+    if _type in (pygame.KEYDOWN, pygame.KEYUP):
+        return pygame.event.Event(_type, key=key, mod=mod)
+    if _type == pygame.MOUSEMOTION:
+        return pygame.event.Event(_type, pos=(x, y))
+    if _type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        return pygame.event.Event(_type, pos=(x, y), button=button)
+    if _type == pygame.TEXTINPUT:
+        return pygame.event.Event(_type, text=chr(key))
+    return pygame.event.Event(_type)
+
+
+class LiveInput:
+    @staticmethod
+    def get_events():
+        return pygame.event.get()
+
+    @staticmethod
+    def get_pressed():
+        return pygame.key.get_pressed()
+
+    @staticmethod
+    def get_mouse_pos():
+        return pygame.mouse.get_pos()
+
+
+class Recorder:
+    """
+    Passes input from source (live input by default) through while logging it
+    input is sampled once per simulation step in get_events, which the loop calls right after the clock
+    """
+
+    def __init__(self, path, level='', source=None):
+        self.source = source if source is not None else LiveInput()
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, FPS, clock.now(), rng.get_seed(), level.encode()))
+        self.keys = KeyState()
+        self.mouse = 0, 0
+        self.frames = 0
+        atexit.register(self.close)
+
+    def get_events(self):
+        events = [e for e in self.source.get_events() if e.type in CODES]
+        self.keys = KeyState(key_mask(self.source.get_pressed()))
+        self.mouse = self.source.get_mouse_pos()
+        data = pack_events(events)
+        self.file.write(FRAME.pack(clock.now(), self.keys.mask, *self.mouse, len(data)))
+        self.file.write(b''.join(data))
+        self.frames += 1
+        return events
+
+    def get_pressed(self):
+        return self.keys
+
+    def get_mouse_pos(self):
+        return self.mouse
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class Replayer:
+    """
+    Feeds a recording back step by step
+    it is also the clock, sample() moves on to the next recorded frame.
+    once the recording runs out finished is set and get_events returns a quit event
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        magic, version, fps, start, self.seed, level = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} replay')
+        if fps != FPS:
+            raise ValueError(f'{path} was recorded at {fps} FPS, the game runs at {FPS}')
+        self.level = level.rstrip(b'\0').decode()
+        self.now = start
+        self.offset = HEADER.size
+        self.keys = KeyState()
+        self.mouse = 0, 0
+        self.events = []
+        self.frames = 0
+        self.finished = False
+
+    def sample(self):
+        if self.offset >= len(self.data):
+            self.finished = True
+            self.events = [pygame.event.Event(pygame.QUIT)]
+            self.now += 1 / FPS
+            return self.now
+        self.now, mask, x, y, count = FRAME.unpack_from(self.data, self.offset)
+        self.offset += FRAME.size
+        self.keys = KeyState(mask)
+        self.mouse = x, y
+        self.events = []
+        for _ in range(count):
+            self.events.append(unpack_event(self.data, self.offset))
+            self.offset += EVENT.size
+        self.frames += 1
+        return self.now
+
+    def get_events(self):
+        return self.events
+
+    def get_pressed(self):
+        return self.keys
+
+    def get_mouse_pos(self):
+        return self.mouse
+
+
+_source = LiveInput()
+
+
+def get_source():
+    return _source
+
+
+def set_source(source):
+    global _source
+    _source = source
+
+
+def record(path, level='', source=None):
+    recorder = Recorder(path, level, source)
+    set_source(recorder)
+    return recorder
+
+
+def play(path):
+    replayer = Replayer(path)
+    set_source(replayer)
+    clock.set_clock(replayer)
+    rng.seed(replayer.seed)
+    return replayer
+
+
+def get_events():
+    return _source.get_events()
+
+
+def get_pressed():
+    return _source.get_pressed()
+
+
+def get_mouse_pos():
+    return _source.get_mouse_pos()
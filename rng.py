@@ -0,0 +1,36 @@
+"""
+Random number streams
+gameplay (bullet offsets, sweep directions), cosmetic (flicker colors) and menus
+(quips, transition picks) each draw from their own random.Random, so drawing
+more or fewer frames never shifts what the bullets do.
+All three are seeded from one number, which headless.py takes as --seed,
+the game as DIMENSION_BEATS_SEED and replays store in their header
+"""
+
+import random
+
+STREAMS = ('gameplay', 'cosmetic', 'menus')
+
+gameplay = random.Random()
+cosmetic = random.Random()
+menus = random.Random()
+
+_seed = 0
+
+
+def seed(value=None):
+    """reseeds every stream from value, or from a fresh random value when None, and returns it"""
+    global _seed
+    if value is None:
+        value = random.SystemRandom().getrandbits(32)
+    _seed = value
+    for name in STREAMS:
+        globals()[name].seed(f'{value}.{name}')
+    return value
+
+
+def get_seed():
+    return _seed
+
+
+seed()
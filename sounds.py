@@ -1,5 +1,4 @@
 import os
-import time
 
 import pygame
 #import numpy
@@ -9,6 +8,8 @@ from typing import Union
 from config import *
 from constants import *
 
+import clock
+import tracing
 from utils import map_to_range, clamp
 
 
@@ -27,7 +28,7 @@ class SoundManager1:
             self.init = False
         self.snd = None
         self.sound: Union[pygame.mixer.Sound, None] = None
-        self._time = time.time()
+        self._time = clock.now()
 
     def set_sound_value(self):
         if self.sound:
@@ -84,7 +85,7 @@ class SoundManager1:
         self.sound.play(fade_ms=100)
         # self.sound_length = self.sound.get_length()
         # self.sound.stop()
-        self._time = time.time()
+        self._time = clock.now()
 
     def get_sound_value(self):
         if self.sound is not None:
@@ -101,7 +102,7 @@ class SoundManager1:
     def get_index(self):
         if self.sound is not None:
             if self.snd is not None:
-                return round(map_to_range(time.time() - self._time, 0, self.total_length, 0, len(self.snd) - 1))
+                return round(map_to_range(clock.now() - self._time, 0, self.total_length, 0, len(self.snd) - 1))
             else:
                 return 0
         else:
@@ -123,7 +124,7 @@ class SoundManager1:
     @property
     def elapsed_time(self):
         if self.sound:
-            return time.time() - self._time
+            return clock.now() - self._time
 
 
 class SoundManager:
@@ -144,8 +145,8 @@ class SoundManager:
             self.init = Globals.get(MUSIC_INIT)
         else:
             self.init = False
-        self._time = time.time()
-        self._paused_timer = time.time()
+        self._time = clock.now()
+        self._paused_timer = clock.now()
         self._paused = False
         self.current_sound = ''
 
@@ -161,6 +162,7 @@ class SoundManager:
         # for playing a single sound effect
         if not self.init:
             return
+        tracing.instant(f'sound.effect.{sound}')
         for i in range(8):
             if not pygame.mixer.Channel(i).get_busy():
                 self.current = sound
@@ -173,14 +175,16 @@ class SoundManager:
         # pygame.mixer.music.play()
 
     def pause(self):
+        tracing.instant('sound.pause')
         pygame.mixer.music.pause()
-        self._paused_timer = time.time()
+        self._paused_timer = clock.now()
         self._paused = True
 
     def resume(self):
+        tracing.instant('sound.resume')
         pygame.mixer.music.unpause()
-        print(time.time() - self._paused_timer)
-        self._time += time.time() - self._paused_timer
+        print(clock.now() - self._paused_timer)
+        self._time += clock.now() - self._paused_timer
         self._paused = False
 
     def toggle_pause(self):
@@ -192,6 +196,7 @@ class SoundManager:
 
     @staticmethod
     def stop():
+        tracing.instant('sound.stop')
         pygame.mixer.music.stop()
         pygame.mixer.music.unload()
         Globals.set(ELAPSED_TIME_FOR_SOUNDTRACK, 0)
@@ -205,22 +210,24 @@ class SoundManager:
 
     def play(self, sound, start=0):
         # for playing a bgm track
+        tracing.instant(f'sound.play.{sound}', start)
         self.current_sound = sound
         pygame.mixer.music.load(os.path.join(ASSETS, 'sounds', f'{sound}.ogg'))
         duration = self.sound_durations.get(sound)
         Globals.set(TOTAL_DURATION_OF_SOUNDTRACK, duration if duration else 0)
         pygame.mixer.music.play(start=start)
-        self._time = time.time()
+        self._time = clock.now()
         self._time -= start
 
     def skip_to(self, _time):
         if _time < 0:
             _time = 0
+        tracing.instant('sound.skip_to', round(_time * 1000))
         print(_time, '[[[[[[[[[[[[[[[[[')
         pygame.mixer.music.stop()
         pygame.mixer.music.play(start=_time)
         # pygame.mixer.music.set_pos(_time)
-        self._time = time.time()
+        self._time = clock.now()
         self._time -= _time
 
     @property
@@ -230,6 +237,6 @@ class SoundManager:
     @property
     def elapsed_time(self):
         if not self._paused:
-            return time.time() - self._time
+            return clock.now() - self._time
         else:
             return self._paused_timer - self._time
@@ -0,0 +1,122 @@
+"""
+Splat rasterizer for point bullets
+stamps every bullet's disc straight into the target's pixel buffer, a few vectorized
+numpy operations for all of them instead of a blit each. The discs are read off the
+circle sprites, so splatted bullets look exactly like blitted ones.
+PointBulletPool switches to it once it holds MIN_BULLETS bullets
+"""
+
+from functools import lru_cache
+
+import pygame
+
+import sprites
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# below this many bullets blitting is faster, python benchmark.py splat finds the crossover
+MIN_BULLETS = 250
+# bullets stamped per assignment, bounds the size of the index arrays
+CHUNK = 512
+
+
+def supported(surf: pygame.Surface):
+    # the buffer is indexed as one flat array of 32 bit pixels
+    return numpy is not None and surf.get_bytesize() == 4 and surf.get_parent() is None
+
+
+@lru_cache(maxsize=None)
+def kernel(r, color):
+    """(xs, ys, rgb) of the opaque pixels of a bullet's circle sprite, and the sprite's offset"""
+    # same arguments PointBullet.get_blits uses
+    surface, offset = sprites.SHAPES['circle'](r, 0, ('white', color), 2 if r > 3 else 1)
+    xs, ys = pygame.surfarray.array_alpha(surface).nonzero()
+    rgb = pygame.surfarray.array3d(surface)[xs, ys]
+    return xs, ys, rgb, offset
+
+
+@lru_cache(maxsize=64)
+def stamps(keys, colors, stride, masks, shifts, losses):
+    """
+    one row per radius and color key: sprite offsets (ox, oy), sprite sizes (w, h) and the
+    buffer offsets and mapped colors of its opaque pixels. Shorter rows repeat their last pixel,
+    writing it twice changes nothing
+    """
+    kernels = [kernel(key // len(colors), colors[key % len(colors)]) for key in keys]
+    size = max(len(xs) for xs, _, _, _ in kernels)
+    ox = numpy.array([offset[0] for _, _, _, offset in kernels], numpy.intp)
+    oy = numpy.array([offset[1] for _, _, _, offset in kernels], numpy.intp)
+    w = numpy.array([xs.max() + 1 for xs, _, _, _ in kernels], numpy.intp)
+    h = numpy.array([ys.max() + 1 for _, ys, _, _ in kernels], numpy.intp)
+    xs = numpy.zeros((len(keys), size), numpy.intp)
+    ys = numpy.zeros((len(keys), size), numpy.intp)
+    pixels = numpy.zeros((len(keys), size), numpy.uint32)
+    for row, (kx, ky, rgb, _) in enumerate(kernels):
+        pad = size - len(kx)
+        xs[row] = numpy.append(kx, [kx[-1]] * pad)
+        ys[row] = numpy.append(ky, [ky[-1]] * pad)
+        rgb = numpy.append(rgb, rgb[-1:].repeat(pad, 0), 0).astype(numpy.uint32)
+        # the sprites are opaque wherever they are drawn, so alpha is always full
+        pixels[row] = masks[3]
+        for channel in range(3):
+            pixels[row] |= (rgb[:, channel] >> losses[channel]) << shifts[channel]
+    return ox, oy, w, h, xs, ys, ys * stride + xs, pixels
+
+
+@lru_cache(maxsize=4)
+def scratch(rows, size):
+    # index and color buffers for a chunk, reused since filling fresh pages costs more than the stamping
+    return numpy.empty((rows, size), numpy.intp), numpy.empty((rows, size), numpy.uint32)
+
+
+def splat(surf: pygame.Surface, x, y, r, color_id, colors):
+    """draws bullets at x, y with radius r and color colors[color_id] the way their sprites would be blitted"""
+    n = len(x)
+    if n == 0:
+        return
+    stride = surf.get_pitch() // 4
+    keys, kind = numpy.unique(r * len(colors) + color_id, return_inverse=True)
+    ox, oy, w, h, xs, ys, offsets, pixels = stamps(tuple(keys.tolist()), tuple(colors), stride,
+                                                   surf.get_masks(), surf.get_shifts(), surf.get_losses())
+    left, top, width, height = surf.get_clip()
+    right, bottom = left + width, top + height
+    # blit truncates the sprite's corner towards zero
+    corner_x = (x + ox[kind]).astype(numpy.intp)
+    corner_y = (y + oy[kind]).astype(numpy.intp)
+    seen = (corner_x < right) & (corner_x + w[kind] > left) & (corner_y < bottom) & (corner_y + h[kind] > top)
+    if not seen.all():
+        kind, corner_x, corner_y = kind[seen], corner_x[seen], corner_y[seen]
+    index_buffer, values_buffer = scratch(CHUNK, offsets.shape[1])
+    view = surf.get_view('1')
+    buffer = numpy.frombuffer(view, numpy.uint32)
+    for start in range(0, len(kind), CHUNK):
+        k = kind[start:start + CHUNK]
+        cx = corner_x[start:start + CHUNK]
+        cy = corner_y[start:start + CHUNK]
+        # k is always in range, clip mode lets take write straight into out without a bounds checked copy
+        index = numpy.take(offsets, k, 0, out=index_buffer[:len(k)], mode='clip')
+        index += (cy * stride + cx)[:, None]
+        values = numpy.take(pixels, k, 0, out=values_buffer[:len(k)], mode='clip')
+        # sprites poking out of the clip rect have their outside pixels pointed at one of
+        # their inside pixels, so every row still draws in bullet order
+        edge = ((cx < left) | (cx + w[k] > right) | (cy < top) | (cy + h[k] > bottom)).nonzero()[0]
+        if len(edge):
+            px = cx[edge, None] + xs[k[edge]]
+            py = cy[edge, None] + ys[k[edge]]
+            inside = (px >= left) & (px < right) & (py >= top) & (py < bottom)
+            first = inside.argmax(1)
+            rows = numpy.arange(len(edge))
+            index[edge] = numpy.where(inside, index[edge], index[edge, first][:, None])
+            values[edge] = numpy.where(inside, values[edge], values[edge, first][:, None])
+            # only the transparent corners of these sprites overlap the clip rect
+            hidden = edge[~inside[rows, first]]
+            if len(hidden):
+                visible = numpy.ones(len(k), bool)
+                visible[hidden] = False
+                index = index[visible]
+                values = values[visible]
+        buffer[index.ravel()] = values.ravel()
+    del buffer, view
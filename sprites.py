@@ -0,0 +1,94 @@
+"""
+Sprite cache
+bullets and enemies blit pre-rendered sprites instead of rasterizing their shapes every frame.
+sprite() renders each combination of shape, size, angle, colors and outline width once,
+angles are snapped to ANGLE_STEP degrees and the cache is an lru of MAX_SPRITES surfaces,
+its hit rate shows up in the F3 overlay
+"""
+
+from functools import lru_cache
+from math import ceil
+
+import pygame
+
+from trig import direction
+from utils import get_triangle_offsets
+
+ANGLE_STEP = 3
+MAX_SPRITES = 1024
+
+
+def snap(angle):
+    return round(angle / ANGLE_STEP) * ANGLE_STEP % 360
+
+
+def _surface(points, pad):
+    # smallest surface around points, and the offset from the shape's origin to its corner
+    left = min(x for x, _ in points) - pad
+    top = min(y for _, y in points) - pad
+    right = max(x for x, _ in points) + pad
+    bottom = max(y for _, y in points) + pad
+    left, top = int(left) - 1, int(top) - 1
+    surface = pygame.Surface((ceil(right) - left + 1, ceil(bottom) - top + 1), pygame.SRCALPHA)
+    return surface, (left, top)
+
+
+def _circle(r, angle, colors, width):
+    fill, outline = colors
+    surface = pygame.Surface((r * 2 + 2, r * 2 + 2), pygame.SRCALPHA)
+    center = r + 1, r + 1
+    pygame.draw.circle(surface, fill, center, r)
+    pygame.draw.circle(surface, outline, center, r, width)
+    return surface, (-r - 1, -r - 1)
+
+
+def _line(length, angle, colors, width):
+    # a thick outer stroke with a thin inner one, drawn from the origin along angle
+    outer, inner = colors
+    dx, dy = direction(angle)
+    points = (0, 0), (dx * length, dy * length)
+    surface, (left, top) = _surface(points, width)
+    start = -left, -top
+    end = points[1][0] - left, points[1][1] - top
+    pygame.draw.line(surface, outer, start, end, width)
+    pygame.draw.line(surface, inner, start, end, 2)
+    return surface, (left, top)
+
+
+def _triangle(length, angle, colors, width):
+    fill, outline = colors
+    offsets = get_triangle_offsets(length, angle)
+    surface, (left, top) = _surface(offsets, width)
+    points = [(x - left, y - top) for x, y in offsets]
+    if fill is not None:
+        pygame.draw.polygon(surface, fill, points)
+    if outline is not None:
+        pygame.draw.polygon(surface, outline, points, width=width)
+    return surface, (left, top)
+
+
+SHAPES = {
+    'circle': _circle,
+    'line': _line,
+    'triangle': _triangle,
+}
+
+
+@lru_cache(maxsize=MAX_SPRITES)
+def sprite(shape, size, angle=0, colors=('white', 'red'), width=2):
+    """(surface, offset), blit the surface at the shape's position plus offset"""
+    surface, offset = SHAPES[shape](size, angle, colors, width)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert_alpha()
+    # most of a sprite is transparent, run length encoding lets blits skip it
+    surface.set_alpha(255, pygame.RLEACCEL)
+    return surface, offset
+
+
+def blits(surf: pygame.Surface, sequence):
+    """blits every (surface, position) pair in one call"""
+    # fblits skips building the list of rects blits returns, pygame-ce has it
+    if hasattr(surf, 'fblits'):
+        surf.fblits(sequence)
+    else:
+        surf.blits(sequence, doreturn=False)
@@ -21,7 +21,7 @@ class Subtitle:
                     self.callback()
 
     def draw(self, surf: pygame.Surface):
-        surf.blit(self.text, self.text.get_rect(center=self.pos))
+        return surf.blit(self.text, self.text.get_rect(center=self.pos))
 
 
 def get_typed_subtitles(_text, _time=2, pos=None, callback=None):
@@ -43,6 +43,8 @@ class SubtitleManager:
             # *get_typed_subtitles('this is a typed text')
         ]
         self.current_subtitle: Union[Subtitle, None] = None
+        # rects the last draw changed
+        self.drawn = []
 
     def clear(self):
         self.subtitles.clear()
@@ -72,5 +74,9 @@ class SubtitleManager:
                 pass
 
     def draw(self, surf: pygame.Surface):
+        self.drawn = []
         if self.current_subtitle:
-            self.current_subtitle.draw(surf)
+            self.drawn.append(self.current_subtitle.draw(surf))
+
+    def get_dirty_rects(self):
+        return self.drawn
@@ -0,0 +1,158 @@
+"""
+Frame timeline tracing
+records spans and instant events into a preallocated ring buffer and writes them
+as Chrome trace event json, which chrome://tracing and ui.perfetto.dev can open.
+Off unless DIMENSION_BEATS_TRACE=<path> is set or enable() is called, call sites
+only check that tracer is not None
+"""
+
+import atexit
+import json
+import os
+from array import array
+from time import perf_counter
+
+COMPLETE = 0
+INSTANT = 1
+
+
+class Tracer:
+    """
+    Ring buffer of trace events
+    once full the oldest events are overwritten, so a long session keeps
+    its most recent capacity events at a fixed memory cost
+    """
+
+    def __init__(self, capacity=1 << 19):
+        self.capacity = capacity
+        self.start = array('d', bytes(8 * capacity))
+        self.duration = array('d', bytes(8 * capacity))
+        self.name = array('I', bytes(4 * capacity))
+        self.value = array('q', bytes(8 * capacity))
+        self.phase = array('B', bytes(capacity))
+        self.count = 0
+        self.names: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._runs: dict[tuple[str, type], str] = {}
+        self.origin = perf_counter()
+
+    def intern(self, name):
+        _id = self._ids.get(name)
+        if _id is None:
+            _id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return _id
+
+    def complete(self, name, start, end):
+        i = self.count % self.capacity
+        self.start[i] = start
+        self.duration[i] = end - start
+        self.name[i] = self.intern(name)
+        self.phase[i] = COMPLETE
+        self.count += 1
+
+    def instant(self, name, value=0):
+        i = self.count % self.capacity
+        self.start[i] = perf_counter()
+        self.duration[i] = 0
+        self.name[i] = self.intern(name)
+        self.value[i] = value
+        self.phase[i] = INSTANT
+        self.count += 1
+
+    def runs(self, prefix):
+        return Runs(self, prefix)
+
+    def run_name(self, prefix, _type):
+        key = prefix, _type
+        name = self._runs.get(key)
+        if name is None:
+            name = self._runs[key] = f'{prefix}.{_type.__name__}'
+        return name
+
+    def to_json(self):
+        events = []
+        first = max(0, self.count - self.capacity)
+        for n in range(first, self.count):
+            i = n % self.capacity
+            name = self.names[self.name[i]]
+            event = {
+                'name': name,
+                'cat': name.split('.')[0],
+                'ts': (self.start[i] - self.origin) * 1e6,
+                'pid': 1,
+                'tid': 1,
+            }
+            if self.phase[i] == COMPLETE:
+                event['ph'] = 'X'
+                event['dur'] = self.duration[i] * 1e6
+            else:
+                event['ph'] = 'i'
+                event['s'] = 't'
+                event['args'] = {'value': self.value[i]}
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'dropped_events': first}}
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_json(), f)
+
+
+class Runs:
+    """spans contiguous runs of objects of the same class, e.g. objects.update.LineBullet1"""
+
+    def __init__(self, tracer: Tracer, prefix):
+        self.tracer = tracer
+        self.prefix = prefix
+        self.type = None
+        self.name = ''
+        self.start = 0.0
+
+    def next(self, _object):
+        _type = type(_object)
+        if _type is not self.type:
+            t = perf_counter()
+            if self.type is not None:
+                self.tracer.complete(self.name, self.start, t)
+            self.type = _type
+            self.name = self.tracer.run_name(self.prefix, _type)
+            self.start = t
+
+    def close(self):
+        if self.type is not None:
+            self.tracer.complete(self.name, self.start, perf_counter())
+            self.type = None
+
+
+tracer: Tracer = None
+
+
+def enable(path=None, capacity=1 << 19):
+    """starts recording, the trace is written to path when the process exits"""
+    global tracer
+    tracer = Tracer(capacity)
+    if path:
+        atexit.register(save, path)
+    return tracer
+
+
+def save(path):
+    if tracer is not None:
+        tracer.save(path)
+
+
+def lap(name, start):
+    # closes the span name started at start and returns the time it ended
+    end = perf_counter()
+    if tracer is not None:
+        tracer.complete(name, start, end)
+    return end
+
+
+def instant(name, value=0):
+    if tracer is not None:
+        tracer.instant(name, value)
+
+
+if os.environ.get('DIMENSION_BEATS_TRACE'):
+    enable(os.environ['DIMENSION_BEATS_TRACE'])
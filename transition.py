@@ -137,6 +137,7 @@ class TransitionManager:
             'circle': CircleTransition,
             'fade': FadeTransition,
         }
+        self.drawn_state = None
 
     def close(self):
         self.transition.k = self.transition.multiplier
@@ -161,3 +162,14 @@ class TransitionManager:
 
     def draw(self, surf: pygame.Surface):
         self.transition.draw(surf)
+
+    def get_dirty_rects(self):
+        # a running transition covers the whole screen, so does any change to how it looks,
+        # e.g. the fade surface is opaque until its first update. An open one draws nothing
+        transition = self.transition
+        state = transition, transition.get_size(), transition.surf.get_alpha()
+        changed = state != self.drawn_state
+        self.drawn_state = state
+        if changed or transition.status not in ('ready', 'open'):
+            return None
+        return []
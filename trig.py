@@ -0,0 +1,26 @@
+"""
+Trig lookup tables
+unit vectors for every integer degree and cached bursts of velocities,
+so emitters don't call cos and sin for every bullet they fire
+"""
+
+from functools import lru_cache
+from math import cos, sin, radians
+
+COS = tuple(cos(radians(i)) for i in range(360))
+SIN = tuple(sin(radians(i)) for i in range(360))
+
+
+def direction(angle):
+    """unit vector for an angle in degrees, integer angles are read from the tables"""
+    if isinstance(angle, int):
+        angle %= 360
+        return COS[angle], SIN[angle]
+    angle = radians(angle)
+    return cos(angle), sin(angle)
+
+
+@lru_cache(maxsize=512)
+def burst(step, offset=0, speed=1.0):
+    """velocities of a ring of bullets fired every step degrees starting at offset"""
+    return tuple((COS[i % 360] * speed, SIN[i % 360] * speed) for i in range(offset, 360 + offset, step))
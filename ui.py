@@ -1,5 +1,5 @@
-import time
-
+import clock
+import replay
 from utils import *
 import pygame
 
@@ -19,7 +19,7 @@ class Button:
         self.is_active = False
 
     def update(self, events):
-        mx, my = pygame.mouse.get_pos()
+        mx, my = replay.get_mouse_pos()
         if self.rect.collidepoint(mx, my):
             self.is_active = True
         else:
@@ -75,10 +75,10 @@ class InputBox:
         self.text = initial_string
         self.allowed_input = 'abcdefghijklmnopqrstuvwxyz1234567890' if not self.numeric_only else '1234567890'
         self.cursor_visible = True
-        self.cursor_blink_timer = time.time()
+        self.cursor_blink_timer = clock.now()
 
     def update(self, events):
-        mx, my = pygame.mouse.get_pos()
+        mx, my = replay.get_mouse_pos()
         if self.rect.collidepoint(mx, my):
             self.is_hovered = True
         else:
@@ -112,8 +112,8 @@ class InputBox:
         else:
             display_text = self.text if self.text != '' else self.default
         if self.is_active:
-            if time.time() - self.cursor_blink_timer > 0.5:
-                self.cursor_blink_timer = time.time()
+            if clock.now() - self.cursor_blink_timer > 0.5:
+                self.cursor_blink_timer = clock.now()
                 self.cursor_visible = not self.cursor_visible
             if self.cursor_visible:
                 display_text += '_'
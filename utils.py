@@ -1,6 +1,7 @@
 import math
 import os
-import time
+
+import clock
 from config import ASSETS
 from functools import lru_cache
 from typing import Literal
@@ -104,6 +105,12 @@ def get_triangle(length, pos, angle):
     return points
 
 
+@lru_cache(maxsize=1024)
+def get_triangle_offsets(length, angle):
+    """vertices of get_triangle relative to its center, shared by every triangle with the same size and angle"""
+    return tuple((i.x, i.y) for i in get_triangle(length, (0, 0), angle))
+
+
 def draw_triangle(surf: pygame.Surface, pos=(150, 150), color=(255, 255, 255), angle=45, length=50, width=0):
     points = get_triangle(length, pos, angle)
     pygame.draw.polygon(surf, color, points, width=width)
@@ -116,33 +123,33 @@ def draw_triangle(surf: pygame.Surface, pos=(150, 150), color=(255, 255, 255), a
 class Timer:
     def __init__(self, timeout=0.0, callback=None):
         self.timeout = timeout
-        self.timer = time.time()
-        self.paused_timer = time.time()
+        self.timer = clock.now()
+        self.paused_timer = clock.now()
         self.paused = False
         self.callback_done = False
         self.callable = callback
 
     def reset(self):
-        self.timer = time.time()
+        self.timer = clock.now()
 
     def pause(self):
         self.paused = True
-        self.paused_timer = time.time()
+        self.paused_timer = clock.now()
 
     def resume(self):
         self.paused = False
-        self.timer -= time.time() - self.paused_timer
+        self.timer -= clock.now() - self.paused_timer
 
     @property
     def elapsed(self):
         if self.paused:
-            return time.time() - self.timer - (time.time() - self.paused_timer)
-        return time.time() - self.timer
+            return self.paused_timer - self.timer
+        return clock.now() - self.timer
 
     @property
     def tick(self):
         if self.elapsed > self.timeout:
-            self.timer = time.time()  # reset timer
+            self.timer = clock.now()  # reset timer
             if self.callable is not None:
                 self.callable()
             return True